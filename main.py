@@ -1,16 +1,1636 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache, wraps
 import time
+import calendar
 import re
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
+from email.utils import parsedate_to_datetime
 import json
 import psycopg2
-import math
+import io
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+import os
+import hashlib
+import threading
+import queue
+import gzip
+import argparse
+import http.server
+import sys
+import cProfile
+import pstats
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+# The resource module is only available on Unix, where it is used to ...
+# ...report the peak memory use of benchmarks
+try:
+    import resource
+except ImportError:
+    resource = None
+# PyArrow is only needed for the Parquet and Arrow export formats
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+
+def has_attr_value(attrs, key: str, value: str):
+    """Function to check whether the raw attributes of a tag, as seen by the
+    tree builder while parsing, contain a specified attribute value.
+    Arguments:
+    - attrs: The attributes of the tag.
+    - key (str): The name of the attribute.
+    - value (str): The value (or one of the space separated values) of the
+                  attribute.
+    """
+    attr_value = attrs.get(key) or ""
+    if isinstance(attr_value, str):
+        attr_value = attr_value.split()
+    return value in attr_value
+
+
+def is_listing_page_tag(name: str, attrs=None):
+    """Function to match the parts of a listing page that are used for
+    scraping: the event cards and the pagination.
+    Arguments:
+    - name (str): The name of the tag.
+    - attrs (optional): The attributes of the tag. Recent versions of
+                  BeautifulSoup only pass the tag name to the function, in
+                  which case all tags with a matching name are kept.
+    """
+    if name == "section":
+        return attrs is None or has_attr_value(attrs, "class",
+                                               "event-card-details")
+    if name == "li":
+        return attrs is None or has_attr_value(attrs, "data-testid",
+                                               "pagination-parent")
+    return False
+
+
+def is_event_page_tag(name: str, attrs=None):
+    """Function to match the parts of an event page that are used for
+    scraping: the ld+json script, the location and the highlights.
+    Arguments:
+    - name (str): The name of the tag.
+    - attrs (optional): The attributes of the tag. Recent versions of
+                  BeautifulSoup only pass the tag name to the function, in
+                  which case all tags with a matching name are kept.
+    """
+    if name == "script":
+        return attrs is None or has_attr_value(attrs, "type",
+                                               "application/ld+json")
+    if name == "div":
+        return attrs is None or has_attr_value(attrs, "class",
+                                               "location-info__address")
+    if name == "ul":
+        return attrs is None or has_attr_value(attrs, "data-testid",
+                                               "highlights")
+    return False
+
+
+# Strainers to parse only the parts of the pages that are used for scraping
+LISTING_PAGE_STRAINER = SoupStrainer(is_listing_page_tag)
+EVENT_PAGE_STRAINER = SoupStrainer(is_event_page_tag)
+
+
+
+@dataclass
+class EventRecord:
+    """Define a class that holds the scraped data of a single music event.
+    The slots keep the memory footprint small for large crawls.
+    """
+    __slots__ = ("name", "time", "duration", "venue", "address",
+                 "low_price", "high_price", "booking_status", "url")
+    name: str
+    time: datetime
+    duration: int
+    venue: str
+    address: str
+    low_price: float
+    high_price: float
+    booking_status: str
+    url: str
+
+    def to_row(self):
+        """Method to convert the record into a tuple of field values."""
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+
+# The output DataFrame columns, in the order of the EventRecord fields
+EVENT_COLUMNS = [
+    "Event",
+    "Date and Time",
+    "Duration (in minutes)",
+    "Venue",
+    "Address",
+    "Lowest Price",
+    "Highest Price",
+    "Booking Status",
+    "URL",
+]
+
+# The pattern of the numeric event ID at the end of an Eventbrite event URL
+EVENT_ID_PATTERN = re.compile(r"-(\d+)/?(?:[?#].*)?$")
+
+# The supported policies for the key used to deduplicate listed events
+DEDUP_KEY_POLICIES = ("event_id", "name_time", "name")
+
+# The supported modes for loading the scraped data into the database
+DB_LOAD_MODES = ("replace", "upsert")
+
+# The maximum number of memoized date and time strings
+DATETIME_CACHE_SIZE = 1024
+
+# How far in the past a year-less listing date may be before it is ...
+# ...taken to be in the next year, e.g. an ongoing event that started ...
+# ...a few weeks ago stays in the current year
+YEAR_ROLLOVER_GRACE = timedelta(days=30)
+
+# The month numbers of the abbreviated month names on listing pages
+MONTH_NUMBERS = {
+    month_abbr: month_num
+    for month_num, month_abbr in enumerate(calendar.month_abbr)
+    if month_abbr
+}
+
+# The supported transports for fetching pages
+TRANSPORT_MODES = ("live", "record", "replay")
+
+# The root URL of the website that is scraped
+EVENTBRITE_URL = "https://www.eventbrite.com.au"
+
+# The supported benchmark modes: the scraper over the recorded corpus, ...
+# ...replayed or served by a local stub HTTP server, and the dedup ...
+# ...index and the database load over synthetic events
+BENCHMARK_MODES = ("replay", "stub", "dedup", "db")
+
+# The supported formats and compressions of the exported data files
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+EXPORT_COMPRESSIONS = (None, "gzip")
+
+# The response statuses with which a host asks clients to slow down
+THROTTLE_STATUSES = (429, 503)
+
+# The raw markup of the event cards and the pagination of a listing page, ...
+# ...which is hashed to detect unchanged listing pages without parsing them
+LISTING_DIGEST_PATTERN = re.compile(
+    rb"<section[^>]*event-card-details.*?</section>"
+    rb"|<li[^>]*pagination-parent.*?</li>",
+    re.DOTALL,
+)
+
+# The stages of a run whose memory allocations are reported in profiling mode
+PROFILED_STAGES = ("scrap_data", "export_data", "send_email", "send_digests",
+                   "move_to_pgDB")
+
+# The files whose memory allocations are left out of the top allocators: ...
+# ...tracemalloc itself and the import system
+PROFILER_IGNORED_FILES = (
+    tracemalloc.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+)
+
+# The environment variable that enables the profiling mode
+PROFILE_ENV_VAR = "MUSIC_SCRAPER_PROFILE"
+
+# The event page details of an event without an event page
+EMPTY_EVENT_DETAILS = {
+    "low_price": None,
+    "high_price": None,
+    "venue": None,
+    "address": None,
+    "duration": None,
+    "start_time": None,
+}
+
+
+
+class RunMetrics:
+    """Define a class that collects the metrics of a scraper run: latency
+    histograms per stage and counters such as bytes, retries and errors.
+    It is shared by the worker threads of the run.
+    """
+
+    # The upper bounds in seconds of the latency histogram buckets
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+               float("inf"))
+
+    def __init__(self):
+        """Initialize a new instance of the RunMetrics class."""
+        self.lock = threading.Lock()
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.counters = {}
+
+
+    def observe(self, stage: str, seconds: float):
+        """Method to record the duration of a call of a stage.
+        Arguments:
+        - stage (str): The name of the stage.
+        - seconds (float): The duration of the call.
+        """
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "max": 0.0,
+                    "buckets": [0] * len(self.BUCKETS),
+                }
+                self.stages[stage] = histogram
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+            histogram["max"] = max(histogram["max"], seconds)
+            for index, upper_bound in enumerate(self.BUCKETS):
+                if seconds <= upper_bound:
+                    histogram["buckets"][index] += 1
+                    break
+
+
+    def merge_stages(self, stages: dict):
+        """Method to add the stage histograms collected by another
+        RunMetrics, e.g. in a parsing worker process.
+        Arguments:
+        - stages (dict): The stages attribute of the other RunMetrics.
+        """
+        with self.lock:
+            for stage, other in stages.items():
+                histogram = self.stages.get(stage)
+                if histogram is None:
+                    self.stages[stage] = {
+                        "count": other["count"],
+                        "sum": other["sum"],
+                        "max": other["max"],
+                        "buckets": list(other["buckets"]),
+                    }
+                    continue
+                histogram["count"] += other["count"]
+                histogram["sum"] += other["sum"]
+                histogram["max"] = max(histogram["max"], other["max"])
+                histogram["buckets"] = [
+                    count + other_count for count, other_count
+                    in zip(histogram["buckets"], other["buckets"])
+                ]
+
+
+    def count(self, name: str, value: int = 1):
+        """Method to increment a counter.
+        Arguments:
+        - name (str): The name of the counter.
+        - value (int, optional): The increment. Default is 1.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+    def set(self, name: str, value: int):
+        """Method to set a counter that is tracked elsewhere.
+        Arguments:
+        - name (str): The name of the counter.
+        - value (int): The value of the counter.
+        """
+        with self.lock:
+            self.counters[name] = value
+
+
+    def stage_mean(self, stage: str):
+        """Method to get the mean duration in seconds of a call of a stage.
+        Arguments:
+        - stage (str): The name of the stage.
+        """
+        histogram = self.stages.get(stage)
+        if not histogram:
+            return 0.0
+        return histogram["sum"] / histogram["count"]
+
+
+    def to_report(self):
+        """Method to build the run report as a dictionary."""
+        with self.lock:
+            duration = (datetime.now() - self.started_at).total_seconds()
+            # Measure the throughput over the scraping stage if it was ...
+            # ...timed, otherwise over the whole run
+            scrape_seconds = self.stages.get("scrap_data", {}).get("sum",
+                                                                   duration)
+            stages = {}
+            for stage, histogram in self.stages.items():
+                cumulative_count = 0
+                buckets = {}
+                for upper_bound, bucket_count in zip(self.BUCKETS,
+                                                     histogram["buckets"]):
+                    cumulative_count += bucket_count
+                    buckets[str(upper_bound)] = cumulative_count
+                stages[stage] = {
+                    "count": histogram["count"],
+                    "sum": histogram["sum"],
+                    "mean": histogram["sum"] / histogram["count"],
+                    "max": histogram["max"],
+                    # Cumulative counts per bucket upper bound
+                    "buckets": buckets,
+                }
+            return {
+                "started_at": self.started_at.isoformat(),
+                "duration_seconds": duration,
+                "events_per_second": self.counters.get("events", 0)
+                                     / scrape_seconds
+                                     if scrape_seconds else None,
+                "counters": dict(self.counters),
+                "stages": stages,
+            }
+
+
+    def write_json(self, path: str, labels: dict = None):
+        """Method to write the run report as a JSON file.
+        Arguments:
+        - path (str): The path of the JSON file.
+        - labels (dict, optional): Additional fields of the report, such
+                      as the country and city of the run.
+        """
+        report = dict(labels or {})
+        report.update(self.to_report())
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+    def write_prometheus(self, path: str, labels: dict = None):
+        """Method to write the metrics in the Prometheus text format, e.g.
+        for the textfile collector of a node exporter.
+        Arguments:
+        - path (str): The path of the metrics file.
+        - labels (dict, optional): Labels added to every metric.
+        """
+        def format_labels(extra_labels):
+            all_labels = dict(labels or {})
+            all_labels.update(extra_labels)
+            return ",".join('{}="{}"'.format(key, str(value)
+                                             .replace("\\", "\\\\")
+                                             .replace('"', '\\"'))
+                            for key, value in all_labels.items())
+
+        report = self.to_report()
+        lines = [
+            "# HELP music_scraper_stage_seconds Duration of each call of a "
+            "scraper stage.",
+            "# TYPE music_scraper_stage_seconds histogram",
+        ]
+        for stage, histogram in report["stages"].items():
+            for upper_bound, cumulative_count in histogram["buckets"].items():
+                upper_bound = "+Inf" if upper_bound == "inf" else upper_bound
+                lines.append("music_scraper_stage_seconds_bucket{{{}}} {}"
+                             .format(format_labels({"stage": stage,
+                                                    "le": upper_bound}),
+                                     cumulative_count))
+            lines.append("music_scraper_stage_seconds_sum{{{}}} {}".format(
+                format_labels({"stage": stage}), histogram["sum"]))
+            lines.append("music_scraper_stage_seconds_count{{{}}} {}".format(
+                format_labels({"stage": stage}), histogram["count"]))
+        for name, value in report["counters"].items():
+            lines.append("# TYPE music_scraper_{}_total counter".format(name))
+            lines.append("music_scraper_{}_total{{{}}} {}".format(
+                name, format_labels({}), value))
+        if report["events_per_second"] is not None:
+            lines.append("# TYPE music_scraper_events_per_second gauge")
+            lines.append("music_scraper_events_per_second{{{}}} {}".format(
+                format_labels({}), report["events_per_second"]))
+        # Write to a temporary file first so that the collector never ...
+        # ...reads a partially written file
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+
+
+
+def timed_stage(stage: str):
+    """Function to create a decorator that records the duration of every
+    call of a MusicEventScraper method as a stage of the run metrics.
+    Arguments:
+    - stage (str): The name of the stage.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            # Snapshot the memory around the main stages in profiling mode
+            profiled = self.profiler is not None and stage in PROFILED_STAGES
+            if profiled:
+                self.profiler.begin_stage(stage)
+            start_time = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.metrics.observe(stage, time.perf_counter() - start_time)
+                if profiled:
+                    self.profiler.end_stage(stage)
+        return wrapper
+    return decorator
+
+
+
+class RunProfiler:
+    """Define a class that profiles a scraper run: a deterministic profile
+    of the threads of the run with cProfile, a sampled profile of the
+    stacks of all threads for flamegraphs, and the top memory allocators
+    of each stage with tracemalloc. The parsing processes, if any, are
+    not profiled.
+    """
+
+    def __init__(self, sample_interval: float = 0.005,
+                 top_allocators: int = 15, traceback_frames: int = 10):
+        """Initialize a new instance of the RunProfiler class.
+        Arguments:
+        - sample_interval (float, optional): The number of seconds between
+                      two samples of the thread stacks. Default is 0.005.
+        - top_allocators (int, optional): The number of top memory
+                      allocators reported for each stage. Default is 15.
+        - traceback_frames (int, optional): The number of frames stored by
+                      tracemalloc for each allocation. Default is 10.
+        """
+        self.sample_interval = sample_interval
+        self.top_allocators = top_allocators
+        self.traceback_frames = traceback_frames
+        self.lock = threading.Lock()
+        self.profile = cProfile.Profile()
+        self.thread_profiles = []
+        self.local = threading.local()
+        self.stack_counts = Counter()
+        self.stage_snapshots = {}
+        self.stage_allocators = {}
+        self.stop_event = threading.Event()
+        self.sampler = threading.Thread(target=self.sample_stacks,
+                                        name="profiler-sampler", daemon=True)
+
+
+    def start(self):
+        """Method to start profiling."""
+        tracemalloc.start(self.traceback_frames)
+        self.sampler.start()
+        # Profile the threads started from now on, except the sampler
+        threading.setprofile(self.profile_thread)
+        self.local.profile = self.profile
+        self.profile.enable()
+
+
+    def stop(self):
+        """Method to stop profiling."""
+        self.profile.disable()
+        threading.setprofile(None)
+        self.stop_event.set()
+        self.sampler.join()
+        tracemalloc.stop()
+
+
+    def profile_thread(self, frame, event, arg):
+        """Method called on the first event of each new thread, which
+        replaces itself with a cProfile profiler of the thread.
+        Arguments:
+        - frame: The current frame.
+        - event: The profiling event.
+        - arg: The argument of the event.
+        """
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # The profiler of the main thread already covers all ...
+            # ...threads on Python versions where only one can be active
+            return
+        self.local.profile = profile
+        with self.lock:
+            self.thread_profiles.append(profile)
+
+
+    def sample_stacks(self):
+        """Method to sample the stacks of all threads until profiling stops,
+        counting the collapsed stacks.
+        """
+        sampler_id = threading.get_ident()
+        # The methods whose samples are the overhead of the profiler
+        profiler_codes = {
+            RunProfiler.profile_thread.__code__,
+            RunProfiler.run_unprofiled.__code__,
+        }
+        while not self.stop_event.wait(self.sample_interval):
+            thread_names = {thread.ident: thread.name
+                            for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    if code in profiler_codes:
+                        frames = None
+                        break
+                    frames.append("{} ({}:{})".format(
+                        code.co_name, os.path.basename(code.co_filename),
+                        code.co_firstlineno,
+                    ))
+                    frame = frame.f_back
+                if frames is None:
+                    continue
+                # Group the threads of a pool under one root frame
+                thread_name = re.sub(r"[-_]\d+", "",
+                                     thread_names.get(thread_id, "thread"))
+                frames.append(thread_name)
+                self.stack_counts[";".join(reversed(frames))] += 1
+
+
+    def run_unprofiled(self, function, *args):
+        """Method to call a function with the deterministic profile of the
+        current thread paused, so that the work of the profiler itself is
+        not counted in the profile of the run.
+        Arguments:
+        - function: The function to call.
+        - *args: The arguments of the function.
+        """
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            # The current thread is not profiled
+            return function(*args)
+        profile.disable()
+        try:
+            return function(*args)
+        finally:
+            profile.enable()
+
+
+    def begin_stage(self, stage: str):
+        """Method to take a memory snapshot at the start of a stage.
+        Arguments:
+        - stage (str): The name of the stage.
+        """
+        self.stage_snapshots[stage] = self.run_unprofiled(
+            tracemalloc.take_snapshot
+        )
+
+
+    def end_stage(self, stage: str):
+        """Method to compare the memory at the end of a stage with its
+        start, and keep the top allocators. The allocations of other
+        threads running at the same time are included.
+        Arguments:
+        - stage (str): The name of the stage.
+        """
+        start_snapshot = self.stage_snapshots.pop(stage, None)
+        if start_snapshot is None:
+            return
+        self.stage_allocators[stage] = self.run_unprofiled(
+            self.top_stage_allocators, start_snapshot
+        )
+
+
+    def top_stage_allocators(self, start_snapshot):
+        """Method to compare the memory now with a snapshot and return the
+        top allocators, without the allocations of the profiler itself and
+        of the import system.
+        Arguments:
+        - start_snapshot: The tracemalloc snapshot taken at the start of
+                      the stage.
+        """
+        end_snapshot = tracemalloc.take_snapshot()
+        # Leave out the stacks counted by the sampler thread as well
+        sampler_code = RunProfiler.sample_stacks.__code__
+        sampler_lines = {(sampler_code.co_filename, line)
+                         for _, _, line in sampler_code.co_lines()}
+        allocators = []
+        for statistic in end_snapshot.compare_to(start_snapshot, "lineno"):
+            frame = statistic.traceback[0]
+            if (frame.filename in PROFILER_IGNORED_FILES
+                    or (frame.filename, frame.lineno) in sampler_lines):
+                continue
+            allocators.append(statistic)
+        return allocators[:self.top_allocators]
+
+
+    def write(self, base_path: str):
+        """Method to write the pstats file, the collapsed stacks for
+        flamegraph tools, and the top memory allocators of each stage,
+        and return their paths.
+        Arguments:
+        - base_path (str): The path of the files without their extensions.
+        """
+        # Merge the profiles of all threads
+        stats = pstats.Stats(self.profile)
+        with self.lock:
+            for profile in self.thread_profiles:
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    # The thread did not record any calls
+                    pass
+        pstats_path = base_path + ".pstats"
+        stats.dump_stats(pstats_path)
+
+        # Write one line per stack, e.g. for flamegraph.pl or speedscope
+        stacks_path = base_path + ".collapsed.txt"
+        with open(stacks_path, "w", encoding="utf-8") as file:
+            for stack, count in self.stack_counts.most_common():
+                file.write("{} {}\n".format(stack, count))
+
+        allocators_path = base_path + ".allocations.txt"
+        with open(allocators_path, "w", encoding="utf-8") as file:
+            for stage, allocators in self.stage_allocators.items():
+                file.write("== {} ==\n".format(stage))
+                for allocator in allocators:
+                    file.write(str(allocator) + "\n")
+                file.write("\n")
+
+        # Print the functions with the highest cumulative time
+        stats.sort_stats("cumulative").print_stats(20)
+        print("The profile has been saved as {}, {} and {}."
+              .format(pstats_path, stacks_path, allocators_path))
+        return [pstats_path, stacks_path, allocators_path]
+
+
+
+class ResponseCache:
+    """Define a class that stores the HTTP validators (ETag and
+    Last-Modified) and the extracted details of event pages on disk, so
+    that unchanged pages can be revalidated with a conditional GET
+    instead of being downloaded and parsed again.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 20000,
+                 ttl: float = 7 * 24 * 3600):
+        """Initialize a new instance of the ResponseCache class.
+        Arguments:
+        - cache_dir (str): The directory in which cache entries are stored.
+        - max_entries (int, optional): The maximum number of entries to
+                      keep. The least recently used entries are evicted
+                      beyond this size. Default is 20000.
+        - ttl (float, optional): The number of seconds after which an
+                      unused entry expires. Default is 7 days.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+        # Initialize the cache statistics, guarded by a lock as the ...
+        # ...cache is shared between the worker threads
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+
+    def entry_path(self, url: str):
+        """Method to get the path of the cache entry file of a URL.
+        Arguments:
+        - url (str): The URL of the cached page.
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json")
+
+
+    def get(self, url: str):
+        """Method to get the cache entry of a URL, or None if there is no
+        entry or the entry has expired.
+        Arguments:
+        - url (str): The URL of the cached page.
+        """
+        path = self.entry_path(url)
+        try:
+            # Discard the entry if it has not been used within the TTL
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+
+    def conditional_headers(self, entry):
+        """Method to build the conditional request headers from a cache
+        entry.
+        Arguments:
+        - entry: The cache entry returned by the get method, or None.
+        """
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+    def put(self, url: str, response, details: dict):
+        """Method to store the validators of a response together with the
+        details extracted from it. Responses without validators are not
+        stored.
+        Arguments:
+        - url (str): The URL of the page.
+        - response: The requests Response object of the page.
+        - details (dict): The details extracted from the page.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": len(response.content),
+            "details": details,
+        }
+        # Write to a temporary file first so that readers never see a ...
+        # ...partially written entry
+        path = self.entry_path(url)
+        temp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(temp_path, path)
+
+
+    def touch(self, url: str, entry):
+        """Method to record a cache hit for a revalidated entry.
+        Arguments:
+        - url (str): The URL of the cached page.
+        - entry: The cache entry that was revalidated.
+        """
+        # Refresh the modification time, which is used for TTL and ...
+        # ...least recently used eviction
+        try:
+            os.utime(self.entry_path(url))
+        except OSError:
+            pass
+        with self.lock:
+            self.hits += 1
+            self.bytes_saved += entry.get("size", 0)
+
+
+    def record_miss(self):
+        """Method to record a cache miss."""
+        with self.lock:
+            self.misses += 1
+
+
+    def evict(self):
+        """Method to remove the expired entries and the least recently used
+        entries beyond the maximum number of entries.
+        """
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, file_name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        # Sort the entries from the most to the least recently used
+        entries.sort(reverse=True)
+        now = time.time()
+        for rank, (mtime, path) in enumerate(entries):
+            if rank >= self.max_entries or now - mtime > self.ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+    def print_summary(self):
+        """Method to print the cache hit and miss counters."""
+        print("Cache hits: {}, misses: {}, bytes saved: {}"
+              .format(self.hits, self.misses, self.bytes_saved))
+
+
+
+class ReplayCorpus:
+    """Define a class that records fetched pages to a compressed on-disk
+    corpus, and replays them so that the scraper can run fully offline
+    and deterministically.
+    """
+
+    def __init__(self, corpus_dir: str):
+        """Initialize a new instance of the ReplayCorpus class.
+        Arguments:
+        - corpus_dir (str): The directory of the corpus.
+        """
+        self.corpus_dir = corpus_dir
+        self.manifest_path = os.path.join(corpus_dir, "manifest.json")
+
+
+    def page_path(self, url: str):
+        """Method to get the path of the recorded page of a URL.
+        Arguments:
+        - url (str): The URL of the page.
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.corpus_dir, key + ".html.gz")
+
+
+    def start_recording(self, country: str, city: str):
+        """Method to start recording a crawl, saving the time of the
+        recording and the crawled location in the corpus manifest.
+        Arguments:
+        - country (str): The country of the crawl.
+        - city (str): The city of the crawl.
+        """
+        os.makedirs(self.corpus_dir, exist_ok=True)
+        with open(self.manifest_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "recorded_at": datetime.now().isoformat(),
+                "country": country,
+                "city": city,
+            }, file)
+
+
+    def load_manifest(self):
+        """Method to load the corpus manifest. Return an empty dictionary if
+        there is no manifest.
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+
+    def record(self, url: str, content: bytes):
+        """Method to save the content of a fetched page.
+        Arguments:
+        - url (str): The URL of the page.
+        - content (bytes): The content of the page.
+        """
+        with gzip.open(self.page_path(url), "wb") as file:
+            file.write(content)
+
+
+    def replay(self, url: str):
+        """Method to load the recorded content of a page. Return None if the
+        page was not recorded.
+        Arguments:
+        - url (str): The URL of the page.
+        """
+        try:
+            with gzip.open(self.page_path(url), "rb") as file:
+                return file.read()
+        except OSError:
+            return None
+
+
+
+@dataclass
+class HostState:
+    """Define a class to hold the politeness state of one host."""
+
+    __slots__ = ("rate", "concurrency", "tokens", "updated_at",
+                 "blocked_until", "last_decrease_at", "in_flight",
+                 "throttled", "errors")
+
+    rate: float
+    concurrency: float
+    tokens: float
+    updated_at: float
+    blocked_until: float
+    last_decrease_at: float
+    in_flight: int
+    throttled: int
+    errors: int
+
+
+
+class PolitenessScheduler:
+    """Define a thread-safe scheduler that keeps a token bucket and a
+    concurrency limit for each host. Both adapt to the responses of the
+    host: they grow additively while requests succeed quickly, and shrink
+    multiplicatively when the host throttles, fails or slows down. A
+    Retry-After header pauses all requests to the host.
+    """
+
+    def __init__(self, initial_rate: float = 2, max_rate: float = 10,
+                 min_rate: float = 0.2, initial_concurrency: int = 2,
+                 max_concurrency: int = 8, latency_target: float = 2,
+                 rate_increase: float = 0.1, decrease_factor: float = 0.5,
+                 decrease_interval: float = 1):
+        """Initialize a new instance of the PolitenessScheduler class.
+        Arguments:
+        - initial_rate (float, optional): The initial number of requests
+                      per second to each host. Default is 2.
+        - max_rate (float, optional): The maximum number of requests per
+                      second to each host. Default is 10.
+        - min_rate (float, optional): The minimum number of requests per
+                      second to each host. Default is 0.2.
+        - initial_concurrency (int, optional): The initial number of
+                      concurrent requests to each host. Default is 2.
+        - max_concurrency (int, optional): The maximum number of concurrent
+                      requests to each host. Default is 8.
+        - latency_target (float, optional): The number of seconds above
+                      which a response is taken as a sign of overload.
+                      Default is 2.
+        - rate_increase (float, optional): The number of requests per
+                      second added to the rate after each fast successful
+                      request. Default is 0.1.
+        - decrease_factor (float, optional): The factor by which the rate
+                      and concurrency are multiplied on overload.
+                      Default is 0.5.
+        - decrease_interval (float, optional): The minimum number of
+                      seconds between two decreases, so that the requests
+                      in flight during an overload only count once.
+                      Default is 1.
+        """
+        self.initial_rate = initial_rate
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.initial_concurrency = max(1, initial_concurrency)
+        self.max_concurrency = max(1, max_concurrency)
+        self.latency_target = latency_target
+        self.rate_increase = rate_increase
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+
+    def host_state(self, host: str):
+        """Method to get the state of a host, creating it on first use.
+        It must be called with the lock held.
+        Arguments:
+        - host (str): The host name.
+        """
+        state = self.hosts.get(host)
+        if state is None:
+            now = time.monotonic()
+            state = HostState(
+                rate=min(self.initial_rate, self.max_rate),
+                concurrency=min(self.initial_concurrency,
+                                self.max_concurrency),
+                tokens=1.0,
+                updated_at=now,
+                blocked_until=now,
+                last_decrease_at=float("-inf"),
+                in_flight=0,
+                throttled=0,
+                errors=0,
+            )
+            self.hosts[host] = state
+        return state
+
+
+    def acquire(self, url: str):
+        """Method to wait until a request to the host of a URL is allowed
+        by its Retry-After pause, concurrency limit and rate limit.
+        Arguments:
+        - url (str): The URL to request.
+        """
+        host = urlsplit(url).netloc
+        with self.condition:
+            while True:
+                state = self.host_state(host)
+                # Refill the bucket for the time elapsed since the ...
+                # ...last update
+                now = time.monotonic()
+                state.tokens = min(1.0, state.tokens
+                                   + (now - state.updated_at) * state.rate)
+                state.updated_at = now
+                if now < state.blocked_until:
+                    wait_time = state.blocked_until - now
+                elif state.in_flight >= int(state.concurrency):
+                    # Wait for a request in flight to be released
+                    wait_time = None
+                elif state.tokens < 1:
+                    wait_time = (1 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return
+                # Release the lock while waiting
+                self.condition.wait(wait_time)
+
+
+    def release(self, url: str, response, latency: float):
+        """Method to release a request to the host of a URL, and adapt the
+        rate and concurrency of the host to its outcome.
+        Arguments:
+        - url (str): The requested URL.
+        - response: The response, or None if the request failed.
+        - latency (float): The duration of the request in seconds.
+        """
+        host = urlsplit(url).netloc
+        with self.condition:
+            state = self.host_state(host)
+            state.in_flight -= 1
+            now = time.monotonic()
+            retries = getattr(getattr(response, "raw", None), "retries", None)
+            if response is not None \
+                    and response.status_code in THROTTLE_STATUSES:
+                state.throttled += 1
+                # Pause all requests to the host for as long as it asks
+                retry_after = self.retry_after_seconds(response)
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until,
+                                              now + retry_after)
+                overloaded = True
+            elif response is None or response.status_code >= 500 \
+                    or (retries is not None and retries.history):
+                state.errors += 1
+                overloaded = True
+            else:
+                overloaded = latency > self.latency_target
+
+            if not overloaded:
+                # Additive increase: the concurrency grows by about one ...
+                # ...per window of concurrent successful requests
+                state.rate = min(self.max_rate,
+                                 state.rate + self.rate_increase)
+                state.concurrency = min(
+                    self.max_concurrency,
+                    state.concurrency + 1 / state.concurrency,
+                )
+            elif now - state.last_decrease_at >= self.decrease_interval:
+                # Multiplicative decrease, at most once per interval
+                state.rate = max(self.min_rate,
+                                 state.rate * self.decrease_factor)
+                state.concurrency = max(
+                    1.0, state.concurrency * self.decrease_factor
+                )
+                state.last_decrease_at = now
+            self.condition.notify_all()
+
+
+    def retry_after_seconds(self, response):
+        """Method to get the number of seconds to wait from the Retry-After
+        header of a response, which is either a number of seconds or an
+        HTTP date. Return None if there is no valid header.
+        Arguments:
+        - response: The response of the host.
+        """
+        retry_after = response.headers.get("Retry-After")
+        if not retry_after:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc))
+                   .total_seconds())
+
+
+    def print_summary(self):
+        """Method to print the adapted rate and concurrency of each host."""
+        with self.condition:
+            for host, state in self.hosts.items():
+                print("{}: {:.1f} requests/sec, concurrency {}, {} throttled, "
+                      "{} failed".format(host, state.rate,
+                                         int(state.concurrency),
+                                         state.throttled, state.errors))
+
+
+
+class DedupIndex:
+    """Define a thread-safe set of event keys, which can be shared by
+    several scrapers to deduplicate events across cities.
+    """
+
+    def __init__(self):
+        """Initialize a new instance of the DedupIndex class."""
+        self.keys = set()
+        self.lock = threading.Lock()
+
+
+    def add(self, key):
+        """Method to add a key to the index. Return True if the key was
+        not in the index yet.
+        Arguments:
+        - key: The hashable key of an event.
+        """
+        with self.lock:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+
+    def __len__(self):
+        return len(self.keys)
+
+
+
+class PipelineSink:
+    """Define a class that runs a sink of the pipelined run in its own
+    thread, consuming the batches of scraped events from a bounded queue
+    while the scraping is still going. A failure of the sink is recorded
+    and its remaining batches are discarded, so that it neither stops the
+    other sinks nor blocks the scraping.
+    """
+
+    def __init__(self, name: str, handle_batch, finish=None, cleanup=None,
+                 max_batches: int = 4):
+        """Initialize a new instance of the PipelineSink class.
+        Arguments:
+        - name (str): The name of the sink.
+        - handle_batch: The function called with each batch of events.
+        - finish (optional): The function called once all batches have
+                      been handled without errors. Its return value is
+                      kept as the result of the sink. Default is None.
+        - cleanup (optional): The function called at the end, even if the
+                      sink failed. Default is None.
+        - max_batches (int, optional): The maximum number of batches
+                      waiting in the queue before the scraping waits for
+                      the sink. Default is 4.
+        """
+        self.name = name
+        self.handle_batch = handle_batch
+        self.finish = finish
+        self.cleanup = cleanup
+        self.queue = queue.Queue(maxsize=max(1, max_batches))
+        self.thread = threading.Thread(target=self.consume,
+                                       name=name + "-sink", daemon=True)
+        self.error = None
+        self.result = None
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+
+    def start(self):
+        """Method to start the thread of the sink."""
+        self.thread.start()
+
+
+    def put(self, batch):
+        """Method to queue a batch of events for the sink.
+        Arguments:
+        - batch: The list of EventRecord objects.
+        """
+        self.queue.put(batch)
+
+
+    def close(self, error: Exception = None):
+        """Method to signal the end of the batches, and wait for the sink to
+        finish.
+        Arguments:
+        - error (Exception, optional): The error that stopped the
+                      scraping, in which case the sink is not finished.
+                      Default is None.
+        """
+        if error is not None and self.error is None:
+            self.error = error
+        self.queue.put(None)
+        self.thread.join()
+
+
+    def consume(self):
+        """Method to handle the queued batches until the end is signaled."""
+        self.started_at = time.perf_counter()
+        try:
+            while True:
+                batch = self.queue.get()
+                if batch is None:
+                    break
+                if self.error is None:
+                    self.run_step(self.handle_batch, batch)
+            if self.error is None and self.finish is not None:
+                self.result = self.run_step(self.finish)
+        finally:
+            if self.cleanup is not None:
+                self.run_step(self.cleanup)
+            self.finished_at = time.perf_counter()
+
+
+    def run_step(self, function, *args):
+        """Method to call a function of the sink, record its duration, and
+        record its error instead of raising it.
+        Arguments:
+        - function: The function to call.
+        - args: The arguments of the function.
+        """
+        start_time = time.perf_counter()
+        try:
+            return function(*args)
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+                print(f"The {self.name} sink failed: {e}")
+        finally:
+            self.busy_seconds += time.perf_counter() - start_time
+
+
+
+class EmailDelivery:
+    """Define a class that delivers emails to many recipients. The email
+    template is read once, the messages are serialized once, and they are
+    sent in batches over a bounded number of persistent authenticated
+    SMTP connections. The recipients that could not be sent to are
+    reported with their errors for each delivery.
+    """
+
+    def __init__(self, sender_email: str, sender_password: str = None,
+                 smtp_server: str = "smtp.gmail.com", smtp_port: int = 465,
+                 use_ssl: bool = True,
+                 template_path: str = "email-html-body-template.txt",
+                 max_connections: int = 4, batch_size: int = 100,
+                 timeout: float = 30):
+        """Initialize a new instance of the EmailDelivery class.
+        Arguments:
+        - sender_email (str): The email address of the sender.
+        - sender_password (str, optional): The password used to log in to
+                      the SMTP server. If set to None, the connection is
+                      not authenticated, e.g. for a local test server
+                      such as aiosmtpd. Default is None.
+        - smtp_server (str, optional): The host name of the SMTP server.
+                      Default is 'smtp.gmail.com'.
+        - smtp_port (int, optional): The port of the SMTP server.
+                      Default is 465.
+        - use_ssl (bool, optional): Whether to connect over SSL.
+                      Default is True.
+        - template_path (str, optional): The path of the HTML template of
+                      the email body. Default is
+                      'email-html-body-template.txt'.
+        - max_connections (int, optional): The maximum number of SMTP
+                      connections that send concurrently. Default is 4.
+        - batch_size (int, optional): The number of messages sent over a
+                      connection in one batch. Default is 100.
+        - timeout (float, optional): The number of seconds to wait for the
+                      SMTP server. Default is 30.
+        """
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.use_ssl = use_ssl
+        self.max_connections = max(1, max_connections)
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        # Read the email template once for all emails
+        with open(template_path, "r") as file:
+            self.template = file.read()
+        self.placeholder_count = self.template.count("%s")
+        # Keep the idle connections to reuse them for the next batches
+        self.idle_connections = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.sent_count = 0
+
+
+    def render_body(self, city: str):
+        """Method to render the HTML body of the email for a city.
+        Arguments:
+        - city (str): The city name filled into the template.
+        """
+        return self.template%((city,) * self.placeholder_count)
+
+
+    def build_message(self, subject: str, body: str, file_paths=(),
+                      attachments=()):
+        """Method to build and serialize a message once, without its
+        recipient, so that it can be sent to any number of recipients.
+        Arguments:
+        - subject (str): The subject line of the email.
+        - body (str): The HTML body of the email.
+        - file_paths (optional): The paths of the files to attach.
+        - attachments (optional): The (file name, content bytes) pairs of
+                      in-memory files to attach.
+        """
+        # Create a MIMEMultipart object to combine different parts of ...
+        # ...the email
+        message = MIMEMultipart()
+        message["Subject"] = subject
+        message["From"] = self.sender_email
+        # Attach the HTML body part to the email
+        message.attach(MIMEText(body, "html"))
+        # Attach the files to the email
+        for file_path in file_paths:
+            with open(file_path, "rb") as file:
+                message.attach(MIMEApplication(
+                    file.read(), Name=os.path.basename(file_path)
+                ))
+        for file_name, content in attachments:
+            message.attach(MIMEApplication(content, Name=file_name))
+        return message.as_string()
+
+
+    def connect(self):
+        """Method to open a new SMTP connection and log in to it."""
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port,
+                                      timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port,
+                                  timeout=self.timeout)
+        if self.sender_password is not None:
+            try:
+                server.login(self.sender_email, self.sender_password)
+            except smtplib.SMTPException:
+                server.close()
+                raise
+        return server
+
+
+    def connect_unless_aborted(self, abort: dict):
+        """Method to open a new SMTP connection for a delivery, or return
+        None if the delivery was aborted. If the connection or the login
+        fails, the delivery is aborted, as the other connections would
+        only fail the same way, e.g. with thousands of failed logins.
+        Arguments:
+        - abort (dict): The state of the delivery, whose 'error' is set
+                      to the error that aborted it.
+        """
+        with self.lock:
+            if abort["error"] is not None:
+                return None
+        try:
+            return self.connect()
+        except (smtplib.SMTPException, OSError) as e:
+            with self.lock:
+                if abort["error"] is None:
+                    abort["error"] = "Delivery aborted: {}".format(e)
+            return None
+
+
+    def send_batch(self, batch, abort: dict):
+        """Method to send a batch of messages over one connection, and
+        return the number of messages sent and the errors of the
+        recipients that failed.
+        Arguments:
+        - batch: The (recipient, message) pairs to send.
+        - abort (dict): The state of the delivery, whose 'error' is set
+                      when it is aborted.
+        """
+        try:
+            server = self.idle_connections.get_nowait()
+        except queue.Empty:
+            server = None
+        sent_count = 0
+        failures = {}
+        for index, (recipient, message) in enumerate(batch):
+            # Reconnect once if the connection was closed by the server
+            for attempt in range(2):
+                if server is None:
+                    server = self.connect_unless_aborted(abort)
+                    if server is None:
+                        # Fail the rest of the batch without connecting
+                        for failed_recipient, _ in batch[index:]:
+                            failures[failed_recipient] = abort["error"]
+                        return sent_count, failures
+                try:
+                    server.sendmail(self.sender_email, [recipient],
+                                    "To: {}\n".format(recipient) + message)
+                    sent_count += 1
+                    break
+                except smtplib.SMTPServerDisconnected as e:
+                    server = None
+                    if attempt == 1:
+                        failures[recipient] = str(e)
+                except smtplib.SMTPException as e:
+                    # The recipient or message was refused, but the ...
+                    # ...connection can still be used
+                    failures[recipient] = str(e)
+                    break
+                except OSError as e:
+                    # The connection failed, so reconnect
+                    server = None
+                    if attempt == 1:
+                        failures[recipient] = str(e)
+        if server is not None:
+            self.idle_connections.put(server)
+        return sent_count, failures
+
+
+    def deliver(self, messages):
+        """Method to send messages in batches with a bounded number of
+        concurrent connections. Return the number of messages sent and
+        the errors of the recipients that failed.
+        Arguments:
+        - messages: The (recipient, message) pairs to send.
+        """
+        messages = list(messages)
+        batches = [messages[start:start + self.batch_size]
+                   for start in range(0, len(messages), self.batch_size)]
+        sent_count = 0
+        failures = {}
+        abort = {"error": None}
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            for batch_sent_count, batch_failures in executor.map(
+                    lambda batch: self.send_batch(batch, abort), batches):
+                sent_count += batch_sent_count
+                failures.update(batch_failures)
+        with self.lock:
+            self.sent_count += sent_count
+        return sent_count, failures
+
+
+    def send(self, message: str, recipients):
+        """Method to send the same message to each of the recipients.
+        Return the number of messages sent and the errors of the
+        recipients that failed.
+        Arguments:
+        - message (str): The message built by the build_message method.
+        - recipients: The email addresses of the recipients.
+        """
+        return self.deliver((recipient, message) for recipient in recipients)
+
+
+    def close(self):
+        """Method to close all the idle SMTP connections."""
+        while True:
+            try:
+                server = self.idle_connections.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+
+
+@dataclass
+class Subscriber:
+    """Define a class to represent the email address of a subscriber and
+    the filter of the events in their digest. A filter field set to None
+    or left empty matches all events.
+    """
+
+    email: str
+    min_price: float = None
+    max_price: float = None
+    start_time: datetime = None
+    end_time: datetime = None
+    venues: tuple = ()
+
+
+
+class EventIndex:
+    """Define a class that indexes a DataFrame of events once, so that the
+    events matching the filter of each subscriber are found without
+    scanning the whole DataFrame: the events are sorted by date and time,
+    bucketed by lowest price and hashed by venue.
+    """
+
+    def __init__(self, df, price_bucket_width: float = 10):
+        """Initialize a new instance of the EventIndex class.
+        Arguments:
+        - df: The cleaned DataFrame of events to index.
+        - price_bucket_width (float, optional): The width of the lowest
+                      price buckets. Default is 10.
+        """
+        self.df = df.reset_index(drop=True)
+        self.price_bucket_width = price_bucket_width
+        # Sort the row positions by date and time, for binary searches ...
+        # ...of date windows
+        self.times = self.df["Date and Time"].to_numpy(dtype="datetime64[ns]")
+        self.time_order = np.argsort(self.times, kind="stable")
+        self.sorted_times = self.times[self.time_order]
+        # The rank of each row in date and time order
+        self.time_ranks = np.empty(len(self.time_order), dtype=np.intp)
+        self.time_ranks[self.time_order] = np.arange(len(self.time_order))
+        # Group the row positions by lowest price bucket, with the ...
+        # ...bucket numbers sorted for range searches
+        self.prices = self.df["Lowest Price"].to_numpy(dtype=float)
+        self.price_buckets = self.df.groupby(
+            np.floor(self.prices / price_bucket_width)
+        ).indices
+        self.price_bucket_keys = np.sort(
+            np.fromiter(self.price_buckets, dtype=float)
+        )
+        # Group the row positions by normalized venue name
+        self.venue_keys = self.df["Venue"].str.strip().str.lower() \
+                          .to_numpy(dtype=object)
+        self.venues = self.df.groupby(self.venue_keys).indices
+
+
+    def time_candidates(self, start_time, end_time):
+        """Method to get the row positions of the events within a date
+        window, with binary searches.
+        Arguments:
+        - start_time: The earliest date and time, or None.
+        - end_time: The latest date and time, or None.
+        """
+        start = 0 if start_time is None else np.searchsorted(
+            self.sorted_times, np.datetime64(start_time, "ns"), side="left"
+        )
+        end = len(self.sorted_times) if end_time is None else np.searchsorted(
+            self.sorted_times, np.datetime64(end_time, "ns"), side="right"
+        )
+        return self.time_order[start:end]
+
+
+    def price_candidates(self, min_price, max_price):
+        """Method to get the row positions of the events in the price
+        buckets that overlap a price range. The events in the edge buckets
+        may be outside the range.
+        Arguments:
+        - min_price: The minimum lowest price, or None.
+        - max_price: The maximum lowest price, or None.
+        """
+        start = 0 if min_price is None else np.searchsorted(
+            self.price_bucket_keys,
+            np.floor(min_price / self.price_bucket_width), side="left"
+        )
+        end = len(self.price_bucket_keys) if max_price is None \
+              else np.searchsorted(
+                  self.price_bucket_keys,
+                  np.floor(max_price / self.price_bucket_width), side="right"
+              )
+        bucket_rows = [self.price_buckets[key]
+                       for key in self.price_bucket_keys[start:end]]
+        if not bucket_rows:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(bucket_rows)
+
+
+    def venue_candidates(self, venues):
+        """Method to get the row positions of the events at any of the
+        venues, with hash lookups.
+        Arguments:
+        - venues: The venue names.
+        """
+        venue_rows = [self.venues[key] for key in
+                      {venue.strip().lower() for venue in venues}
+                      if key in self.venues]
+        if not venue_rows:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(venue_rows)
+
+
+    def query(self, subscriber):
+        """Method to get the DataFrame of the events that match the filter
+        of a subscriber, sorted by date and time. Only the smallest set of
+        candidate events found with the indexes is checked against the
+        whole filter.
+        Arguments:
+        - subscriber: The Subscriber object with the filter.
+        """
+        candidate_sets = []
+        if subscriber.start_time is not None \
+                or subscriber.end_time is not None:
+            candidate_sets.append(self.time_candidates(subscriber.start_time,
+                                                       subscriber.end_time))
+        if subscriber.min_price is not None \
+                or subscriber.max_price is not None:
+            candidate_sets.append(self.price_candidates(subscriber.min_price,
+                                                        subscriber.max_price))
+        if subscriber.venues:
+            candidate_sets.append(self.venue_candidates(subscriber.venues))
+        if not candidate_sets:
+            return self.df
+        rows = min(candidate_sets, key=len)
+
+        # Check the candidates against the whole filter
+        mask = np.ones(len(rows), dtype=bool)
+        if subscriber.start_time is not None:
+            mask &= self.times[rows] >= np.datetime64(subscriber.start_time,
+                                                      "ns")
+        if subscriber.end_time is not None:
+            mask &= self.times[rows] <= np.datetime64(subscriber.end_time,
+                                                      "ns")
+        if subscriber.min_price is not None:
+            mask &= self.prices[rows] >= subscriber.min_price
+        if subscriber.max_price is not None:
+            mask &= self.prices[rows] <= subscriber.max_price
+        if subscriber.venues:
+            venue_keys = {venue.strip().lower()
+                          for venue in subscriber.venues}
+            mask &= np.isin(self.venue_keys[rows], list(venue_keys))
+        rows = rows[mask]
+        # Order the matching events by date and time, keeping the order ...
+        # ...of the DataFrame for events at the same time
+        return self.df.iloc[rows[np.argsort(self.time_ranks[rows])]]
+
+
+
+def load_subscribers(path: str):
+    """Function to load the subscribers from a JSON file with a list of
+    objects that have the fields of the Subscriber class. The start and
+    end times are ISO 8601 strings.
+    Arguments:
+    - path (str): The path of the JSON file.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        subscribers = json.load(file)
+    for subscriber in subscribers:
+        for key in ("start_time", "end_time"):
+            if subscriber.get(key):
+                subscriber[key] = datetime.fromisoformat(subscriber[key])
+        subscriber["venues"] = tuple(subscriber.get("venues") or ())
+    return [Subscriber(**subscriber) for subscriber in subscribers]
 
 
 
@@ -19,135 +1639,757 @@ class MusicEventScraper:
     and database operations
     """
 
-    def __init__(self, country: str, city: str, max_events: int = 0):
-        """Initialize a new instance of the MusicEventScraper class.
+    def __init__(self, country: str, city: str, max_events: int = 0,
+                 max_workers: int = 1, timeout: float = 30,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 cache_dir: str = None, known_events_path: str = None,
+                 parser: str = "html.parser", partial_parsing: bool = True,
+                 dedup_key: str = "event_id",
+                 dedup_index=None, db_load_mode: str = "replace",
+                 export_formats: tuple = ("csv",), compression: str = None,
+                 export_dir: str = "exports", transport: str = "live",
+                 corpus_dir: str = "corpus", metrics_path: str = None,
+                 prometheus_path: str = None, parse_workers: int = 0,
+                 scheduler=None, email_delivery=None,
+                 recipients: list = None, subscribers: list = None,
+                 listing_digests_path: str = None, profile: bool = None,
+                 cache_max_entries: int = 20000,
+                 cache_ttl: float = 7 * 24 * 3600,
+                 base_url: str = EVENTBRITE_URL):
+        """Initialize a new instance of the MusicEventScraper class.
+        Arguments:
+        - country (str): The country where the music events are located.
+                      This is used to build the URL for scraping.
+        - city (str): The city within the specified country where the music
+                      events occur. It is also used to build the URL for
+                      scraping.
+        - max_events (int, optional): The maximum number of events to scrape.
+                      If set to 0, all available events will be scraped.
+                      Default is 0.
+        - max_workers (int, optional): The maximum number of event pages
+                      to fetch concurrently. If set to 1, event pages are
+                      fetched one at a time. Default is 1.
+        - timeout (float, optional): The number of seconds to wait for the
+                      server to respond to a request. Default is 30.
+        - max_retries (int, optional): The maximum number of times a
+                      failed request (connection error, timeout or 5xx
+                      response) is retried. Default is 3.
+        - backoff_factor (float, optional): The base delay in seconds of
+                      the exponential backoff between retries. A random
+                      jitter of up to the same amount is added to each
+                      delay. Default is 0.5.
+        - cache_dir (str, optional): The directory of an on-disk cache
+                      used to revalidate event pages with conditional
+                      requests. If set to None, no cache is used.
+                      Default is None.
+        - known_events_path (str, optional): The path of a JSON file that
+                      stores the events scraped by the previous run. If
+                      given, the scraper runs in incremental mode and only
+                      scraps the event pages of new or changed events.
+                      Default is None.
+        - parser (str, optional): The BeautifulSoup tree builder used to
+                      parse the pages, such as 'html.parser', 'lxml' or
+                      'html5lib'. Default is 'html.parser'.
+        - partial_parsing (bool, optional): Whether to build only the parts
+                      of the page trees that are used for scraping.
+                      Default is True.
+        - dedup_key (str, optional): The policy of the key used to detect
+                      events that are listed more than once. 'event_id'
+                      uses the event ID from the event URL, 'name_time'
+                      uses the event name and time, and 'name' uses the
+                      event name only. Default is 'event_id'.
+        - dedup_index (optional): A DedupIndex object shared with other
+                      scrapers to deduplicate events across them. If set
+                      to None, a new index is created. Default is None.
+        - db_load_mode (str, optional): How the scraped data is loaded into
+                      the PostgreSQL database. 'replace' truncates the
+                      table and reloads all events, and 'upsert' inserts
+                      new events, updates changed events and marks the
+                      events that are no longer listed as expired, keyed
+                      by event URL. Default is 'replace'.
+        - export_formats (tuple, optional): The formats of the exported
+                      data files: 'csv', 'parquet' and/or 'arrow'. All
+                      exported files are attached to the email.
+                      Default is ('csv',).
+        - compression (str, optional): The compression of the exported
+                      files: None or 'gzip'. Arrow files do not support
+                      gzip and use zstd whenever compression is set.
+                      Default is None.
+        - export_dir (str, optional): The directory of the Parquet and
+                      Arrow files, which are partitioned by city and
+                      scrape date. Default is 'exports'.
+        - transport (str, optional): How pages are fetched. 'live' fetches
+                      them from the website, 'record' also saves them to
+                      the corpus, and 'replay' loads them from the corpus
+                      only, without any network access. The 'record' and
+                      'replay' transports cannot be used with cache_dir,
+                      known_events_path or listing_digests_path, as every
+                      page must be fetched in full, and their runs only
+                      scrap and export the data. Default is 'live'.
+        - corpus_dir (str, optional): The directory of the recorded pages
+                      used by the 'record' and 'replay' transports.
+                      Default is 'corpus'.
+        - metrics_path (str, optional): The path of the JSON run report
+                      with the per-stage timings and counters, written at
+                      the end of the run. Default is None.
+        - prometheus_path (str, optional): The path of a file to which the
+                      metrics are also written in the Prometheus text
+                      format. Default is None.
+        - parse_workers (int, optional): The number of worker processes
+                      that parse the fetched pages and extract their
+                      details, so that parsing is not limited to one CPU
+                      core. The fetching threads hand the raw pages to
+                      the processes and wait for their results, so
+                      max_workers should be at least as large. If set to
+                      0, pages are parsed in the fetching threads.
+                      Default is 0.
+        - scheduler (optional): A PolitenessScheduler object that adapts
+                      the rate and concurrency of the requests to each
+                      host, and handles throttled (429 and 503) responses
+                      with their Retry-After header. If set to None,
+                      requests are not rate limited. Default is None.
+        - email_delivery (optional): An EmailDelivery object used to send
+                      the emails, which may be shared by several scrapers.
+                      If set to None, one is created for each email sent
+                      with the account set up in the send_email method.
+                      Default is None.
+        - recipients (list, optional): The email addresses of the
+                      recipients. If set to None, the email is sent to
+                      the recipient set up in the send_email method.
+                      Default is None.
+        - subscribers (list, optional): The Subscriber objects that are
+                      sent a digest of the events matching their filter.
+                      If set to None, no digests are sent. Default is None.
+        - listing_digests_path (str, optional): The path of a JSON file
+                      that stores a digest of the event cards of each
+                      listing page and their details. The listing pages
+                      whose cards are unchanged since the previous run
+                      are not parsed, and their stored details are
+                      reused. Combined with known_events_path, their
+                      events are carried forward without any parsing.
+                      Default is None.
+        - profile (bool, optional): Whether to profile the run with a
+                      RunProfiler and write the profiles next to the
+                      exported CSV file. If set to None, profiling is
+                      enabled by a non-empty MUSIC_SCRAPER_PROFILE
+                      environment variable other than '0'.
+                      Default is None.
+        - cache_max_entries (int, optional): The maximum number of entries
+                      kept in the cache of cache_dir. Default is 20000.
+        - cache_ttl (float, optional): The number of seconds after which an
+                      unused entry of the cache of cache_dir expires.
+                      Default is 7 days.
+        - base_url (str, optional): The root URL of the listing pages, such
+                      as a local stub server for benchmarks. Default is
+                      'https://www.eventbrite.com.au'.
+        """
+        if db_load_mode not in DB_LOAD_MODES:
+            raise ValueError("db_load_mode must be one of {}, not {!r}"
+                             .format(", ".join(DB_LOAD_MODES), db_load_mode))
+        for export_format in export_formats:
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError("export_formats must be among {}, not {!r}"
+                                 .format(", ".join(EXPORT_FORMATS),
+                                         export_format))
+            if export_format != "csv" and pa is None:
+                raise ImportError("The {} format requires pyarrow to be "
+                                  "installed".format(export_format))
+        if compression not in EXPORT_COMPRESSIONS:
+            raise ValueError("compression must be one of {}, not {!r}"
+                             .format(EXPORT_COMPRESSIONS, compression))
+        if transport not in TRANSPORT_MODES:
+            raise ValueError("transport must be one of {}, not {!r}"
+                             .format(", ".join(TRANSPORT_MODES), transport))
+        if transport != "live" and (cache_dir or known_events_path
+                                    or listing_digests_path):
+            raise ValueError("The {} transport cannot be used with "
+                             "cache_dir, known_events_path or "
+                             "listing_digests_path".format(transport))
+        if dedup_key not in DEDUP_KEY_POLICIES:
+            raise ValueError("dedup_key must be one of {}, not {!r}"
+                             .format(", ".join(DEDUP_KEY_POLICIES),
+                                     dedup_key))
+        # Initialize instance variables for scraper settings
+        self.country = country
+        self.city = city
+        self.max_events = max_events
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.parser = parser
+        self.partial_parsing = partial_parsing
+        self.parse_workers = max(0, parse_workers)
+        # The pool of parsing processes, created for each crawl
+        self.parse_pool = None
+        self.dedup_key = dedup_key
+        # Pin the reference datetime for parsing the listing dates
+        self.set_reference_now()
+        self.scheduler = scheduler
+        self.email_delivery = email_delivery
+        self.recipients = recipients
+        self.subscribers = subscribers
+        self.db_load_mode = db_load_mode
+        self.export_formats = tuple(export_formats)
+        self.compression = compression
+        self.export_dir = export_dir
+        self.transport = transport
+        self.base_url = base_url
+        self.corpus = ReplayCorpus(corpus_dir)
+        # Create the event page cache if a cache directory is given
+        self.response_cache = ResponseCache(
+            cache_dir, max_entries=cache_max_entries, ttl=cache_ttl
+        ) if cache_dir else None
+        # Create a shared HTTP session that keeps connections alive
+        self.session = self.create_session()
+        # Initialize a list to store the (URL, seconds) latency of ...
+        # ...each request
+        self.request_latencies = []
+        # Initialize the metrics of the run
+        self.metrics = RunMetrics()
+        self.metrics_path = metrics_path
+        self.prometheus_path = prometheus_path
+        # Initialize the critical path breakdown of a pipelined run
+        self.critical_path = None
+        # Initialize the profiling mode
+        if profile is None:
+            profile = os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+        self.profile = profile
+        self.profiler = None
+        self.exported_files = []
+        # Initialize instance variables for the incremental mode
+        self.known_events_path = known_events_path
+        self.listing_digests_path = listing_digests_path
+        self.listing_digests = {}
+        self.scraped_listing_digests = {}
+        self.known_events = {}
+        self.event_fingerprints = {}
+        self.scraped_known_events = {}
+        # Initialize the URLs of the events flushed by an interrupted ...
+        # ...streaming run that is being resumed
+        self.resumed_event_urls = set()
+        self.carried_forward_count = 0
+        # Initialize instance variables to store scraped data
+        self.output_df = None
+        self.event_count = 0
+        self.scraping_finished = False
+        self.dedup_index = dedup_index if dedup_index is not None \
+                           else DedupIndex()
+        self.events = []
+
+
+    def create_session(self):
+        """Method to create a HTTP session with a connection pool, keep-alive
+        connections, and retries with exponential backoff and jitter.
+        """
+        session = requests.Session()
+        # Set the user agent to mimic a browser request
+        session.headers.update({
+            "User-agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; \
+                           rv:61.0) Gecko/20100101 Firefox/61.0"
+        })
+        # Retry connection errors, timeouts and transient server errors ...
+        # ...with exponential backoff plus random jitter. Throttled ...
+        # ...responses are left to the scheduler, if there is one, so ...
+        # ...that it pauses all requests to the host
+        status_forcelist = [500, 502, 504]
+        if self.scheduler is None:
+            status_forcelist.extend(THROTTLE_STATUSES)
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            backoff_jitter=self.backoff_factor,
+            status_forcelist=status_forcelist,
+            respect_retry_after_header=self.scheduler is None,
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        # Size the connection pool so that every listing page and event ...
+        # ...page worker thread can keep its own persistent connection ...
+        # ...to the host
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=max(10, 2 * self.max_workers),
+            max_retries=retry,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+    @timed_stage("fetch")
+    def fetch_response(self, url: str, headers: dict = None):
+        """Method to fetch a specified URL through the shared HTTP session.
+        Return None if the request still fails after all retries.
+        Arguments:
+        - url (str): The URL of the webpage from which to fetch the content.
+        - headers (dict, optional): Additional request headers.
+        """
+        if self.transport == "replay":
+            return self.replay_response(url)
+        start_time = time.perf_counter()
+        self.metrics.count("requests")
+        try:
+            r = self.send_request(url, headers)
+            # Count the retries of the request and the downloaded bytes
+            retries = getattr(r.raw, "retries", None)
+            if retries is not None and retries.history:
+                self.metrics.count("request_retries", len(retries.history))
+            self.metrics.count("response_bytes", len(r.content))
+            r.raise_for_status()
+        except requests.RequestException as e:
+            # Skip the page instead of aborting the whole run
+            print(f"Failed to fetch {url}: {e}")
+            self.metrics.count("request_errors")
+            r = None
+        # Record the latency of the request, including any retries
+        self.request_latencies.append((url, time.perf_counter() - start_time))
+        if r is not None and self.transport == "record" \
+                and r.status_code == 200:
+            # Save the fetched page to the corpus
+            self.corpus.record(url, r.content)
+        return r
+
+
+    def send_request(self, url: str, headers: dict = None):
+        """Method to perform an HTTP GET request through the shared session.
+        If a scheduler is used, the request waits for the scheduler, and
+        throttled responses are retried once the host allows it.
+        Arguments:
+        - url (str): The URL of the webpage from which to fetch the content.
+        - headers (dict, optional): Additional request headers.
+        """
+        if self.scheduler is None:
+            return self.session.get(url, headers=headers,
+                                    timeout=self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.scheduler.acquire(url)
+            start_time = time.perf_counter()
+            r = None
+            try:
+                r = self.session.get(url, headers=headers,
+                                     timeout=self.timeout)
+            finally:
+                # Report the outcome of the request to the scheduler, ...
+                # ...even if it failed
+                self.scheduler.release(url, r,
+                                       time.perf_counter() - start_time)
+            if r.status_code not in THROTTLE_STATUSES:
+                break
+            self.metrics.count("throttled_requests")
+        return r
+
+
+    def replay_response(self, url: str):
+        """Method to build a response from the recorded page of a URL.
+        Return None if the page was not recorded.
+        Arguments:
+        - url (str): The URL of the recorded page.
+        """
+        start_time = time.perf_counter()
+        content = self.corpus.replay(url)
+        self.request_latencies.append((url, time.perf_counter() - start_time))
+        if content is None:
+            print(f"No recorded page for {url}")
+            return None
+        r = requests.Response()
+        r.url = url
+        r.status_code = 200
+        r._content = content
+        return r
+
+
+    @timed_stage("parse")
+    def parse_html(self, c, strainer=None):
+        """Method to parse HTML content into a BeautifulSoup object with the
+        configured parser.
+        Arguments:
+        - c: The HTML content to parse.
+        - strainer (optional): A SoupStrainer that limits parsing to the
+                      matching parts of the page. It is ignored if partial
+                      parsing is disabled.
+        """
+        if not self.partial_parsing:
+            strainer = None
+        return BeautifulSoup(c, self.parser, parse_only=strainer)
+
+
+    def create_soup(self, url: str, strainer=None):
+        """Method to fetch and parse the HTML content from a specified URL
+        to create a BeautifulSoup object. An empty soup object is returned
+        if the request still fails after all retries.
+        Arguments:
+        - url (str): The URL of the webpage from which to fetch the content.
+        - strainer (optional): A SoupStrainer that limits parsing to the
+                      matching parts of the page.
+        """
+        r = self.fetch_response(url)
+        # Extract content from the response
+        c = r.content if r is not None else ""
+        # Parse the content using BeautifulSoup and return the soup object
+        soup = self.parse_html(c, strainer)
+        return soup
+
+
+    def fetch_content(self, url: str, headers: dict = None):
+        """Method to fetch the raw content of a specified URL. Return the
+        response, or None if the request failed, and the content, which is
+        empty if the request failed.
+        Arguments:
+        - url (str): The URL of the webpage from which to fetch the content.
+        - headers (dict, optional): Additional request headers.
+        """
+        r = self.fetch_response(url, headers)
+        return r, r.content if r is not None else b""
+
+
+    def parse_in_pool(self, parse_function, c):
+        """Method to parse HTML content in the pool of parsing processes,
+        and return the extracted result.
+        Arguments:
+        - parse_function: The module-level function that parses the
+                      content in a worker process.
+        - c: The HTML content to parse.
+        """
+        result, stages = self.parse_pool.submit(parse_function, c).result()
+        # Record the parsing and extraction times measured by the ...
+        # ...worker process
+        self.metrics.merge_stages(stages)
+        return result
+
+
+    def extract_total_pages(self, soup):
+        """Method to extract the total number of listing pages from the
+        soup object of a listing page. Return None if the pagination is
+        not found.
+        Arguments:
+        - soup: The BeautifulSoup object of a listing page.
+        """
+        try:
+            return int(
+                soup.find("li", {"data-testid": "pagination-parent"})
+                .text.split("of")[-1]
+                .strip()
+            )
+        except (AttributeError, ValueError):
+            return None
+
+
+    def extract_listed_events(self, soup):
+        """Method to extract the listed details of all the events on a
+        listing page, as (name, URL, booking status, time string) tuples
+        in listing order. The time strings are not parsed yet, as they
+        may be relative to the day of the crawl, e.g. 'Tomorrow at 7:00 PM'.
+        Arguments:
+        - soup: The BeautifulSoup object of a listing page.
+        """
+        listed_events = []
+        # Find all sections with class 'event-card-details' and iterate over them
+        for event in soup.find_all("section",
+                                   {"class": "event-card-details"}):
+            # Extract event name from the current event section
+            event_name = self.extract_event_name(event)
+            # Extract the event URL from the current event section
+            event_url = self.extract_event_url(event)
+            # Extract booking status and event time from the current ...
+            # ...event section
+            event_booking_status, event_time = \
+                self.extract_listed_text(event)
+            listed_events.append(
+                (event_name, event_url, event_booking_status, event_time)
+            )
+        return listed_events
+
+
+    def fetch_listing_page(self, url: str):
+        """Method to fetch a listing page and extract the total number of
+        listing pages and the listed details of its events. If the event
+        cards of the page are unchanged since the previous run, the page
+        is not parsed and the stored details are reused.
         Arguments:
-        - country (str): The country where the music events are located.
-                      This is used to build the URL for scraping.
-        - city (str): The city within the specified country where the music
-                      events occur. It is also used to build the URL for
-                      scraping.
-        - max_events (int, optional): The maximum number of events to scrape.
-                      If set to 0, all available events will be scraped.
-                      Default is 0.
+        - url (str): The URL of the listing page.
         """
-        # Initialize instance variables for scraper settings
-        self.country = country
-        self.city = city
-        self.max_events = max_events
-        # Initialize instance variables to store scraped data
-        self.output_df = None
-        self.event_count = 0
-        self.scraping_finished = False
-        self.event_names = []
-        self.event_booking_statuses = []
-        self.event_times = []
-        self.event_durations = []
-        self.event_venues = []
-        self.event_addresses = []
-        self.event_URLs = []
-        self.event_low_prices = []
-        self.event_high_prices = []
-
-
-    def create_soup(self, url: str):
-        """Method to fetch and parse the HTML content from a specified URL
-        to create a BeautifulSoup object.
+        r, c = self.fetch_content(url)
+        digest = None
+        if self.listing_digests_path and r is not None:
+            digest = self.listing_digest(c)
+            stored_page = self.listing_digests.get(url)
+            if stored_page is not None and stored_page["digest"] == digest:
+                # Skip parsing and card extraction for the unchanged page
+                self.metrics.count("unchanged_listing_pages")
+                self.scraped_listing_digests[url] = stored_page
+                return stored_page["total_pages"], self.parse_listed_times(
+                    stored_page["events"]
+                )
+
+        if self.parse_pool is not None:
+            total_pages, listed_events = self.parse_in_pool(
+                parse_listing_page_content, c
+            )
+        else:
+            soup = self.parse_html(c, LISTING_PAGE_STRAINER)
+            total_pages = self.extract_total_pages(soup)
+            listed_events = self.extract_listed_events(soup)
+        if digest is not None and total_pages is not None:
+            # Store the details of the page for the next run
+            self.scraped_listing_digests[url] = {
+                "digest": digest,
+                "total_pages": total_pages,
+                "events": listed_events,
+            }
+        return total_pages, self.parse_listed_times(listed_events)
+
+
+    def listing_digest(self, c):
+        """Method to compute the digest of the event cards and pagination
+        of a listing page from its raw content, without parsing it.
         Arguments:
-        - url (str): The URL of the webpage from which to fetch the content.
+        - c: The HTML content of a listing page.
         """
-        # Set the user agent to mimic a browser request
-        headers = {
-            "User-agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; \
-                           rv:61.0) Gecko/20100101 Firefox/61.0"
-        }
-        # Perform an HTTP GET request
-        r = requests.get(url, headers=headers)
-        # Extract content from the response
-        c = r.content
-        # Parse the content using BeautifulSoup and return the soup object
-        soup = BeautifulSoup(c, "html.parser")
-        return soup
+        digest = hashlib.sha1()
+        for match in LISTING_DIGEST_PATTERN.finditer(c):
+            digest.update(match.group(0))
+        return digest.hexdigest()
 
 
-    def convert_to_datetime(self, dt_str: str):
-        """Method to convert a date and time string into a datetime object.
+    def parse_listed_times(self, listed_events):
+        """Method to convert the time strings of listed events into datetime
+        objects, relative to the reference datetime of the crawl.
+        Arguments:
+        - listed_events: The (name, URL, booking status, time string)
+                      tuples of the events.
+        """
+        return [
+            (event_name, event_url, event_booking_status,
+             self.convert_to_datetime(event_time)
+             if event_time is not None else None)
+            for event_name, event_url, event_booking_status, event_time
+            in listed_events
+        ]
+
+
+    def load_listing_digests(self):
+        """Method to load the digests and event details of the listing
+        pages of the previous run.
+        """
+        try:
+            with open(self.listing_digests_path, "r",
+                      encoding="utf-8") as file:
+                self.listing_digests = json.load(file)
+        except (OSError, ValueError):
+            # Start from scratch if there is no readable previous run
+            self.listing_digests = {}
+
+
+    def save_listing_digests(self):
+        """Method to save the digests and event details of the listing pages
+        of this run, to be used by the next run.
+        """
+        # Write to a temporary file first so that an interrupted run ...
+        # ...does not corrupt the previous state
+        temp_path = self.listing_digests_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.scraped_listing_digests, file)
+        os.replace(temp_path, self.listing_digests_path)
+
+
+    def parse_event_content(self, c):
+        """Method to parse the HTML content of an event page and extract
+        its details, in the pool of parsing processes if there is one.
+        Arguments:
+        - c: The HTML content of an event page.
+        """
+        if self.parse_pool is not None:
+            return self.parse_in_pool(parse_event_page_content, c)
+        return self.parse_event_page(self.parse_html(c, EVENT_PAGE_STRAINER))
+
+
+    def print_latency_summary(self):
+        """Method to print a summary of the request latencies."""
+        if self.request_latencies:
+            latencies = sorted(t for _, t in self.request_latencies)
+            print("Fetched {} pages: mean latency {:.3f}s, median {:.3f}s, "
+                  "max {:.3f}s".format(len(latencies),
+                                       sum(latencies) / len(latencies),
+                                       latencies[len(latencies) // 2],
+                                       latencies[-1]))
+
+
+    def set_reference_now(self, now: datetime = None):
+        """Method to pin the reference datetime that relative and year-less
+        listing dates are resolved against, and reset the memoized parser.
+        Arguments:
+        - now (datetime, optional): The reference datetime. If not provided,
+                      the current datetime is used.
+        """
+        self.reference_now = now if now is not None else datetime.now()
+        self.reference_weekday_offsets = self.weekday_offsets(
+            self.reference_now
+        )
+        # Memoize the parsed strings, as listing pages repeat the same ...
+        # ...few dozen date and time strings. The results only depend on ...
+        # ...the string and the reference datetime
+        self.datetime_cache = lru_cache(maxsize=DATETIME_CACHE_SIZE)(
+            self.parse_datetime_string
+        )
+
+
+    def roll_over_year(self, event_datetime: datetime):
+        """Method to move a date without a year shown on a listing page to
+        the next year if it would otherwise be too far in the past, e.g. a
+        January event scraped in December.
+        Arguments:
+        - event_datetime (datetime): The datetime in the reference year.
+        """
+        if event_datetime < self.reference_now - YEAR_ROLLOVER_GRACE:
+            try:
+                return event_datetime.replace(year=event_datetime.year + 1)
+            except ValueError:
+                # February 29 does not exist in the next year
+                return event_datetime
+        return event_datetime
+
+
+    def parse_datetime_string(self, dt_str: str):
+        """Method to parse a date and time string into a datetime object,
+        relative to the reference datetime.
         Arguments:
         - dt_str (str): The date and time string input.
         """
-        # Check if the string contains '+'
-        if "+" in dt_str:
-            # Remove the string part that is behind ' + '
-            dt_str = dt_str.split(" + ")[0]
+        # Remove the string part that is behind ' + '
+        dt_str = dt_str.split(" + ")[0]
 
         # Check if the string contains 'at' which is used to separate...
         # ...day of week and time
         if " at " in dt_str:
             # Split the string into day of week and time components
             day_of_week, event_time = dt_str.split(" at ")
-            # Left pad the event time into 'hh:mm AM/PM' format
-            event_time = event_time.rjust(8, "0")
-            # Check if the string indicates the event is happening 'Tomorrow'
-            if day_of_week == "Tomorrow":
-                # Compute tomorrow's date
-                tomorrow_date = (datetime.now() + timedelta(days=1)) \
-                                .strftime("%Y-%m-%d")
-                # Construct the full datetime string for tomorrow's event ...
-                # ...in proper format
-                revised_datetime = tomorrow_date + ", " + event_time
-            # Check if the string indicates the event is happening 'Today'
-            elif day_of_week == "Today":
-                # Compute today's date
-                today_date = datetime.now().strftime("%Y-%m-%d")
-                # Construct the full datetime string for today's event in ...
-                # ...proper format
-                revised_datetime = today_date + ", " + event_time
-            else:
-                # Compute the weekday number for the event from the ...
-                # ...day of week name
-                event_dow = time.strptime(day_of_week, "%A").tm_wday
-                # Get today's weekday number
-                today_dow = datetime.now().weekday()
-                # Calculate the difference in days between today and ...
-                # ...the event day
-                if event_dow > today_dow:
-                    diff_days = event_dow - today_dow
-                else:
-                    diff_days = event_dow - today_dow + 7
-                # Calculate the date of the event based on the difference
-                event_date = (datetime.now() + timedelta(days=diff_days)) \
-                             .strftime("%Y-%m-%d")
-                # Construct the full datetime string for the event in ...
-                # ...proper format
-                revised_datetime = event_date + ", " + event_time
-        else:
-            # Split the string into day of the week, event date, and ...
-            # ...event time
-            day_of_week, event_date, event_time = dt_str.split(", ")
-            # Split the event date string further into month and day
-            event_month, event_day = event_date.split(" ")
-            # Left pad the event day into 'dd' format
-            event_day = event_day.rjust(2, "0")
-            # Left pad the event time into 'hh:mm AM/PM' format
-            event_time = event_time.rjust(8, "0")
-            # Construct the full datetime string for the event in ...
-            # ...proper format
-            revised_datetime = (
-                str(datetime.now().year)
-                + "-"
-                + event_month
-                + "-"
-                + event_day
-                + ", "
-                + event_time
+            # Look up the number of days until the event, e.g. 0 for ...
+            # ...'Today', 1 for 'Tomorrow' or up to 7 for a day name
+            try:
+                diff_days = self.reference_weekday_offsets[day_of_week]
+            except KeyError:
+                raise ValueError("Unknown day of week: " + day_of_week)
+            event_date = self.reference_now.date() \
+                         + timedelta(days=diff_days)
+            event_clock = datetime.strptime(event_time.strip(),
+                                            "%I:%M %p").time()
+            return datetime.combine(event_date, event_clock)
+
+        # Split the string into day of the week, event date, and ...
+        # ...event time
+        day_of_week, event_date, event_time = dt_str.split(", ")
+        # Split the event date string further into month and day
+        event_month, event_day = event_date.split(" ")
+        event_clock = datetime.strptime(event_time.strip(),
+                                        "%I:%M %p").time()
+        try:
+            event_datetime = datetime.combine(
+                date(self.reference_now.year, MONTH_NUMBERS[event_month],
+                     int(event_day)),
+                event_clock,
+            )
+        except ValueError:
+            # February 29 does not exist in the reference year, so the ...
+            # ...event is taken to be in the next year, or to have no ...
+            # ...valid date if it does not exist there either
+            try:
+                return datetime.combine(
+                    date(self.reference_now.year + 1,
+                         MONTH_NUMBERS[event_month], int(event_day)),
+                    event_clock,
+                )
+            except ValueError:
+                return None
+        return self.roll_over_year(event_datetime)
+
+
+    @timed_stage("convert_to_datetime")
+    def convert_to_datetime(self, dt_str: str):
+        """Method to convert a date and time string into a datetime object.
+        The results are memoized for the current reference datetime.
+        Arguments:
+        - dt_str (str): The date and time string input.
+        """
+        return self.datetime_cache(dt_str)
+
+
+    def weekday_offsets(self, now):
+        """Method to build the table of the number of days from a reference
+        date to the next occurrence of each day name used on listing pages.
+        Arguments:
+        - now: The reference datetime.
+        """
+        offsets = {"Today": 0, "Tomorrow": 1}
+        today_dow = now.weekday()
+        for event_dow in range(7):
+            # Same rule as convert_to_datetime: a weekday name refers to ...
+            # ...the next such day, one week ahead if it is today
+            offsets[calendar.day_name[event_dow]] = \
+                (event_dow - today_dow - 1) % 7 + 1
+        return offsets
+
+
+    def convert_series_to_datetime(self, dt_strs):
+        """Method to convert a Pandas Series of raw listing date and time
+        strings into datetimes with vectorized operations. Values that are
+        already datetimes are kept, and unparsable values become NaT.
+        Arguments:
+        - dt_strs: The Pandas Series of date and time strings.
+        """
+        if pd.api.types.is_datetime64_any_dtype(dt_strs):
+            return dt_strs
+        now = pd.Timestamp(self.reference_now)
+        is_text = dt_strs.map(type) == str
+        # Convert the values that are not strings, e.g. datetimes or None
+        result = pd.to_datetime(dt_strs.where(~is_text), errors="coerce")
+        if not is_text.any():
+            return result
+
+        # Remove the string part that is behind ' + '
+        texts = dt_strs[is_text].str.split(" + ", n=1, regex=False).str[0]
+        is_relative = texts.str.contains(" at ", regex=False)
+
+        # Convert relative strings such as 'Tomorrow at 8:00 PM' or ...
+        # ...'Saturday at 7:30 PM' from the weekday offset table
+        relative = texts[is_relative].str.split(" at ", n=1, expand=True,
+                                                regex=False)
+        if len(relative):
+            offsets = relative[0].map(self.reference_weekday_offsets)
+            times = pd.to_datetime(relative[1].str.strip(),
+                                   format="%I:%M %p", errors="coerce") \
+                    - pd.Timestamp("1900-01-01")
+            result.loc[relative.index] = (
+                now.normalize() + pd.to_timedelta(offsets, unit="D") + times
             )
-            # Return the datetime object for the parsed date and time
-            return datetime.strptime(revised_datetime, "%Y-%b-%d, %I:%M %p")
 
-        # Return the datetime object for the parsed date and time
-        return datetime.strptime(revised_datetime, "%Y-%m-%d, %I:%M %p")
+        # Convert absolute strings such as 'Sat, Jun 15, 7:30 PM'
+        absolute = texts[~is_relative].str.split(", ", n=1, regex=False).str[1]
+        if len(absolute):
+            absolute_texts = absolute
+            absolute = pd.to_datetime(
+                str(now.year) + " " + absolute_texts,
+                format="%Y %b %d, %I:%M %p", errors="coerce",
+            )
+            # Move the dates that are too far in the past to the next ...
+            # ...year, except February 29 if the next year has none
+            next_year = absolute + pd.DateOffset(years=1)
+            rolled_over = (absolute < now - YEAR_ROLLOVER_GRACE) \
+                          & (next_year.dt.day == absolute.dt.day)
+            absolute = absolute.where(~rolled_over, next_year)
+            # Take the dates that do not exist in the reference year, ...
+            # ...i.e. February 29, to be in the next year
+            missing = absolute.isna()
+            if missing.any():
+                absolute[missing] = pd.to_datetime(
+                    str(now.year + 1) + " " + absolute_texts[missing],
+                    format="%Y %b %d, %I:%M %p", errors="coerce",
+                )
+            result.loc[absolute.index] = absolute
+        return result
 
 
+    @timed_stage("extract_event_name")
     def extract_event_name(self, soup):
         """Method to extract the event name from a BeautifulSoup object.
         Arguments:
@@ -162,6 +2404,7 @@ class MusicEventScraper:
         return event_name
 
 
+    @timed_stage("extract_event_url")
     def extract_event_url(self, soup):
         """Method to extract the event URL from a BeautifulSoup object.
         Arguments:
@@ -176,15 +2419,14 @@ class MusicEventScraper:
             # Return None if no <a> tag with href is found or another ...
             # ...error occurs
             event_url = None
-        # Append the event URL to corresponding list
-        self.event_URLs.append(event_url)
         # Return the extracted event URL
         return event_url
 
 
-    def extract_listed_details(self, soup):
+    @timed_stage("extract_listed_details")
+    def extract_listed_text(self, soup):
         """Method to extract additional event attributes such as booking
-        status and time from a BeautifulSoup object.
+        status and the unparsed time string from a BeautifulSoup object.
         Arguments:
         - soup: The BeautifulSoup object to extract the additional
         attributes from.
@@ -213,19 +2455,31 @@ class MusicEventScraper:
                 if detail.lower() in status_values:
                     # If it does, assign it to event_booking_status variable
                     event_booking_status = detail
+        # Return the two variables
+        return event_booking_status, event_time
+
+
+    def extract_listed_details(self, soup):
+        """Method to extract additional event attributes such as booking
+        status and time from a BeautifulSoup object.
+        Arguments:
+        - soup: The BeautifulSoup object to extract the additional
+        attributes from.
+        """
+        event_booking_status, event_time = self.extract_listed_text(soup)
         # Convert extracted time into a datetime object
         if event_time is not None:
             event_time = self.convert_to_datetime(event_time)
-        # Append the two variables to the corresponding lists
-        self.event_booking_statuses.append(event_booking_status)
-        self.event_times.append(event_time)
+        return event_booking_status, event_time
 
 
-    def extract_prices(self, soup):
-        """Method to extract lowest price and highest price from a
-        BeautifulSoup object.
+    @timed_stage("extract_structured_data")
+    def extract_structured_data(self, soup):
+        """Method to extract the structured data of an event from the
+        ld+json <script> tag of a BeautifulSoup object. Return an empty
+        dictionary if there is no valid structured data.
         Arguments:
-        - soup: The BeautifulSoup object to extract the prices from.
+        - soup: The BeautifulSoup object to extract the structured data from.
         """
         try:
             # Try find the <script> tag containing the data, and extract ...
@@ -235,6 +2489,27 @@ class MusicEventScraper:
                        .text.strip()
             # Parse the JSON string into a Python dictionary
             json_data = json.loads(json_str)
+        except:
+            return {}
+        # Take the first item if the data is a list of items
+        if isinstance(json_data, list):
+            json_data = json_data[0] if json_data else {}
+        return json_data if isinstance(json_data, dict) else {}
+
+
+    @timed_stage("extract_prices")
+    def extract_prices(self, soup, json_data: dict = None):
+        """Method to extract lowest price and highest price from a
+        BeautifulSoup object.
+        Arguments:
+        - soup: The BeautifulSoup object to extract the prices from.
+        - json_data (dict, optional): The already extracted structured data
+                      of the event. If not provided, it is extracted from
+                      the soup object.
+        """
+        if json_data is None:
+            json_data = self.extract_structured_data(soup)
+        try:
             # Navigate the dictionary to find the lowest and highest ...
             # ...price values
             lowest_price = json_data["offers"][0]["lowPrice"]
@@ -244,11 +2519,11 @@ class MusicEventScraper:
             lowest_price = None
             highest_price = None
 
-        # Append the extracted price values to corresponding lists
-        self.event_low_prices.append(lowest_price)
-        self.event_high_prices.append(highest_price)
+        # Return the extracted price values
+        return lowest_price, highest_price
 
 
+    @timed_stage("extract_location")
     def extract_location(self, soup):
         """Method to extract location information such as venue and address
         from a BeautifulSoup object.
@@ -269,11 +2544,11 @@ class MusicEventScraper:
             # ...during extraction
             venue = None
             address = None
-        # Append the extracted venue and address to corresponding lists
-        self.event_venues.append(venue)
-        self.event_addresses.append(address)
+        # Return the extracted venue and address
+        return venue, address
 
 
+    @timed_stage("extract_duration")
     def extract_duration(self, soup):
         """Method to extract event duration from a BeautifulSoup object.
         Arguments:
@@ -314,67 +2589,333 @@ class MusicEventScraper:
         else:
             duration_mins = None
 
-        # Append the calculated duration to the corresponding list
-        self.event_durations.append(duration_mins)
+        # Return the calculated duration
+        return duration_mins
+
+
+    def extract_structured_location(self, json_data: dict):
+        """Method to extract the venue and address from the structured data
+        of an event.
+        Arguments:
+        - json_data (dict): The structured data of the event.
+        """
+        location = json_data.get("location")
+        if not isinstance(location, dict):
+            return None, None
+        venue = location.get("name")
+        address = location.get("address")
+        if isinstance(address, dict):
+            # Format the postal address like the address shown on the ...
+            # ...event page, e.g. '31 Alfred St Sydney, NSW 2000'
+            street = " ".join(
+                address[key].strip()
+                for key in ("streetAddress", "addressLocality")
+                if address.get(key)
+            )
+            region = " ".join(
+                address[key].strip()
+                for key in ("addressRegion", "postalCode")
+                if address.get(key)
+            )
+            address = ", ".join(part for part in (street, region) if part)
+        if not isinstance(venue, str) or not venue.strip():
+            venue = None
+        if not isinstance(address, str) or not address.strip():
+            address = None
+        return venue, address
+
+
+    def extract_structured_times(self, json_data: dict):
+        """Method to extract the start time and the duration in minutes
+        from the structured data of an event.
+        Arguments:
+        - json_data (dict): The structured data of the event.
+        """
+        try:
+            # Parse the ISO 8601 start and end dates, and keep the local ...
+            # ...time of the event
+            start_date = datetime.fromisoformat(json_data["startDate"])
+            start_time = start_date.replace(tzinfo=None)
+        except:
+            return None, None
+        try:
+            end_date = datetime.fromisoformat(json_data["endDate"])
+            duration_mins = int(
+                (end_date - start_date).total_seconds() // 60
+            )
+        except:
+            duration_mins = None
+        # Only keep the date time if the start date included a time
+        if "T" not in json_data["startDate"]:
+            start_time = None
+        return start_time, duration_mins
+
+
+    def parse_event_page(self, soup):
+        """Method to extract the lowest price, highest price, venue, address,
+        start time, and duration information from the soup object of an
+        event page. The information is taken from the ld+json structured
+        data of the page, and only the missing fields are extracted from
+        the rest of the page.
+        Arguments:
+        - soup: The BeautifulSoup object of an event page.
+        """
+        # Parse the structured data once for all fields
+        json_data = self.extract_structured_data(soup)
+        lowest_price, highest_price = self.extract_prices(soup, json_data)
+        venue, address = self.extract_structured_location(json_data)
+        start_time, duration = self.extract_structured_times(json_data)
+        # Fall back to the page content for the missing fields
+        if venue is None:
+            venue, address = self.extract_location(soup)
+        if duration is None:
+            duration = self.extract_duration(soup)
+        return {
+            "low_price": lowest_price,
+            "high_price": highest_price,
+            "venue": venue,
+            "address": address,
+            "duration": duration,
+            # Keep the start time as a string so that the details can be ...
+            # ...stored as JSON
+            "start_time": start_time.isoformat() if start_time else None,
+        }
+
+
+    def fetch_event_page(self, event_url: str):
+        """Method to fetch an individual event page and extract its details.
+        If a cache is used, the page is revalidated with a conditional
+        request and the cached details are reused when it is unchanged.
+        Return None if no URL was extracted.
+        Arguments:
+        - event_url (str): The URL of an event page to fetch.
+        """
+        if not event_url:
+            return None
+        if self.response_cache is None:
+            _, c = self.fetch_content(event_url)
+            return self.parse_event_content(c)
+
+        # Revalidate the cached entry of the event page, if any
+        entry = self.response_cache.get(event_url)
+        r, c = self.fetch_content(
+            event_url, self.response_cache.conditional_headers(entry)
+        )
+        if r is not None and r.status_code == 304 and entry:
+            # The page has not changed, so skip both the download and ...
+            # ...the parsing and reuse the cached details
+            self.response_cache.touch(event_url, entry)
+            return entry["details"]
+
+        self.response_cache.record_miss()
+        event_details = self.parse_event_content(c)
+        if r is not None and r.status_code == 200:
+            # Store the validators and details for the next run
+            self.response_cache.put(event_url, r, event_details)
+        return event_details
 
 
     def scrap_event_page(self, event_url: str):
-        """Method to handle web scraping of an individual event page.
+        """Method to handle web scraping of an individual event page, and
+        return the extracted details.
         Arguments:
         - event_url (str): The URL of an event page to scrap data from.
         """
         if event_url:
-            # Create a soup object for the event page
-            event_page_soup = self.create_soup(event_url)
-            # Extract the lowest price, highest price, venue, address,...
-            # ...and duration information from the event page
-            self.extract_prices(event_page_soup)
-            self.extract_location(event_page_soup)
-            self.extract_duration(event_page_soup)
-        else:
-            # Append None values to the corresponding instance lists...
-            # ...if no URL was extracted
-            self.event_low_prices.append(None)
-            self.event_high_prices.append(None)
-            self.event_venues.append(None)
-            self.event_addresses.append(None)
-            self.event_durations.append(None)
+            # Fetch the event page and extract the lowest price, highest ...
+            # ...price, venue, address, start time, and duration ...
+            # ...information from it
+            return self.fetch_event_page(event_url)
+        # Return None values if no URL was extracted
+        return dict(EMPTY_EVENT_DETAILS)
+
+
+    def build_event_record(self, event_name, event_url, event_booking_status,
+                           event_time, event_details: dict):
+        """Method to build the record of an event from its listed details
+        and its event page details.
+        Arguments:
+        - event_name: The name of the event.
+        - event_url: The URL of the event.
+        - event_booking_status: The booking status of the event.
+        - event_time: The datetime of the event from the listing page.
+        - event_details (dict): The details extracted from the event page.
+        """
+        if event_details.get("start_time"):
+            # Replace the event time extracted from the listing page ...
+            # ...with the more accurate start time of the event page
+            event_time = datetime.fromisoformat(event_details["start_time"])
+        return EventRecord(
+            name=event_name,
+            time=event_time,
+            duration=event_details["duration"],
+            venue=event_details["venue"],
+            address=event_details["address"],
+            low_price=event_details["low_price"],
+            high_price=event_details["high_price"],
+            booking_status=event_booking_status,
+            url=event_url,
+        )
+
+
+    def event_fingerprint(self, event_name, event_time, event_booking_status):
+        """Method to compute a fingerprint of the listed details of an event,
+        which changes whenever the event name, time or booking status
+        changes.
+        Arguments:
+        - event_name: The name of the event.
+        - event_time: The datetime of the event.
+        - event_booking_status: The booking status of the event.
+        """
+        if event_time is not None:
+            event_time = event_time.isoformat()
+        fingerprint_str = json.dumps([event_name, event_time,
+                                      event_booking_status])
+        return hashlib.sha1(fingerprint_str.encode("utf-8")).hexdigest()
 
 
-    def scrap_listing_page(self, soup):
+    def load_known_events(self):
+        """Method to load the events scraped by the previous run in
+        incremental mode.
+        """
+        try:
+            with open(self.known_events_path, "r", encoding="utf-8") as file:
+                self.known_events = json.load(file)
+        except (OSError, ValueError):
+            # Start from scratch if there is no readable previous run
+            self.known_events = {}
+
+
+    def remember_known_event(self, event):
+        """Method to remember the fingerprint and details of a scraped event,
+        to be saved for the next run in incremental mode.
+        Arguments:
+        - event: The EventRecord object of the event.
+        """
+        if event.url in self.event_fingerprints:
+            self.scraped_known_events[event.url] = {
+                "fingerprint": self.event_fingerprints[event.url],
+                "details": {
+                    "low_price": event.low_price,
+                    "high_price": event.high_price,
+                    "venue": event.venue,
+                    "address": event.address,
+                    "duration": event.duration,
+                    "start_time": event.time.isoformat()
+                                  if event.time else None,
+                },
+            }
+
+
+    def save_known_events(self):
+        """Method to save the fingerprints and details of the events scraped
+        in this run, to be used by the next run in incremental mode.
+        """
+        # Write to a temporary file first so that an interrupted run ...
+        # ...does not corrupt the previous state
+        temp_path = self.known_events_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.scraped_known_events, file)
+        os.replace(temp_path, self.known_events_path)
+
+
+    def lookup_known_event(self, event_name, event_url, event_booking_status,
+                           event_time):
+        """Method to get the event page details of a listed event from the
+        previous run, or None if the event is new or has changed.
+        Arguments:
+        - event_name: The name of the event.
+        - event_url: The URL of the event.
+        - event_booking_status: The booking status of the event.
+        - event_time: The datetime of the event from the listing page.
+        """
+        if not self.known_events_path or not event_url:
+            return None
+        # Fingerprint the event from its listed details, before they ...
+        # ...are completed with the event page details
+        fingerprint = self.event_fingerprint(event_name, event_time,
+                                             event_booking_status)
+        self.event_fingerprints[event_url] = fingerprint
+        known_event = self.known_events.get(event_url)
+        if known_event is None or known_event["fingerprint"] != fingerprint:
+            return None
+        return known_event["details"]
+
+
+    @timed_stage("dedup")
+    def event_key(self, event_name, event_url, event_time):
+        """Method to compute the key used to detect events that are listed
+        more than once, according to the dedup_key policy.
+        Arguments:
+        - event_name: The name of the event.
+        - event_url: The URL of the event.
+        - event_time: The datetime of the event from the listing page.
+        """
+        if self.dedup_key == "event_id" and event_url:
+            # Use the numeric event ID if the URL ends with one, ...
+            # ...otherwise use the URL without its query string
+            match = EVENT_ID_PATTERN.search(event_url)
+            if match:
+                return match.group(1)
+            return self.canonical_url(event_url)
+        if self.dedup_key == "name":
+            return event_name
+        # Use the name and time if there is no URL to take the ID from
+        if event_time is not None:
+            event_time = event_time.isoformat()
+        return json.dumps([event_name, event_time])
+
+
+    def canonical_url(self, event_url: str):
+        """Method to get the URL of an event without its query string and
+        fragment, such as tracking parameters that change between runs.
+        Arguments:
+        - event_url (str): The URL of the event.
+        """
+        return event_url.split("?")[0].split("#")[0]
+
+
+    def scrap_listing_page(self, listed_events):
         """Method to perform web scraping of an event listing page that displays
-        multiple music events.
+        multiple music events. This is a generator that yields the
+        EventRecord object of each new event, in listing order, as soon as
+        its event page has been scraped.
         Arguments:
-        - soup: The BeautifulSoup object to extract information from.
+        - listed_events: The (name, URL, booking status, time) tuples of the
+                      events on the listing page.
         """
-        # Find all sections with class 'event-card-details' and iterate over them
-        listed_events = soup.find_all("section",
-                                      {"class": "event-card-details"})
-        for event in listed_events:
-            # Extract event name from the current event section
-            event_name = self.extract_event_name(event)
-            if event_name not in self.event_names:
-                # If the extracted event name is not found in the ...
-                # ...event_names list, increment the event count and ...
-                # ...append the event name to the list
+        # Initialize lists to collect the listed details of the new ...
+        # ...events on this listing page, in the order they are listed, ...
+        # ...and the details carried forward from the previous run
+        listed_details = []
+        known_details = []
+        for event_name, event_url, event_booking_status, event_time \
+                in listed_events:
+            # Add the key of the event to the index of seen events
+            event_key = self.event_key(event_name, event_url, event_time)
+            if self.dedup_index.add(event_key):
+                # If the event has not been seen yet, increment the ...
+                # ...event count
                 self.event_count += 1
-                self.event_names.append(event_name)
             else:
-                # If the extracted event name is already included in the ...
-                # ...event_names list, skip and move on to the next ...
-                # ...event section
+                # If the event has already been seen, skip and move on ...
+                # ...to the next event section
                 continue
 
-            # Extract the event URL from the current event section
-            event_url = self.extract_event_url(event)
+            if event_url in self.resumed_event_urls:
+                # Skip the events that were already flushed by the ...
+                # ...interrupted run that is being resumed
+                continue
 
-            # Extract booking status and event time from the current ...
-            # ...event section
-            self.extract_listed_details(event)
+            listed_details.append(
+                (event_name, event_url, event_booking_status, event_time)
+            )
 
-            # Further extract the lowest price, highest price, venue, ...
-            # ...address, and duration information from the event page
-            self.scrap_event_page(event_url)
+            # Look up the details of unchanged events from the previous run
+            known_details.append(
+                self.lookup_known_event(event_name, event_url,
+                                        event_booking_status, event_time)
+            )
 
             # Check if the maximum number of events has been reached
             if self.max_events > 0:
@@ -384,104 +2925,422 @@ class MusicEventScraper:
                     # And exit the loop
                     break
 
+        # Only the event pages of new or changed events need to be fetched
+        urls_to_fetch = [
+            listed[1]
+            for listed, event_details in zip(listed_details, known_details)
+            if event_details is None
+        ]
+        # Fetch the event pages concurrently with a bounded pool of ...
+        # ...worker threads. Executor.map yields the details in the same ...
+        # ...order as the URLs, so the records are built in the same ...
+        # ...order as in a sequential run
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetched_details = executor.map(self.scrap_event_page,
+                                           urls_to_fetch)
+            for listed, event_details in zip(listed_details, known_details):
+                if event_details is None:
+                    event_details = next(fetched_details)
+                else:
+                    self.carried_forward_count += 1
+                # Build the record of the event in one step from its ...
+                # ...listed details and event page details
+                event = self.build_event_record(*listed, event_details)
+                if self.known_events_path:
+                    self.remember_known_event(event)
+                self.metrics.count("events")
+                yield event
+
+
+    def clean_dataframe(self, df):
+        """Method to clean a DataFrame of events with vectorized operations:
+        parse the raw date and time strings, coerce the prices and duration
+        to numbers, drop the incomplete and past events, and sort the rest.
+        Arguments:
+        - df: The DataFrame with the EVENT_COLUMNS columns to clean.
+        """
+        # Compare against the reference datetime, which a replayed run ...
+        # ...pins to the recording time, so that its output does not ...
+        # ...shrink as the corpus ages
+        now = self.reference_now
+        return (
+            df.assign(**{
+                "Date and Time": lambda d:
+                    self.convert_series_to_datetime(d["Date and Time"]),
+                "Duration (in minutes)": lambda d:
+                    pd.to_numeric(d["Duration (in minutes)"],
+                                  errors="coerce"),
+                "Lowest Price": lambda d:
+                    pd.to_numeric(d["Lowest Price"], errors="coerce"),
+                "Highest Price": lambda d:
+                    pd.to_numeric(d["Highest Price"], errors="coerce"),
+            })
+            # Drop the rows that have missing values for either ...
+            # ...'Date and Time', 'Venue', or 'URL' columns
+            .dropna(subset=["Date and Time", "Venue", "URL"], how="any")
+            # Keep the events that will occur after the reference datetime
+            .loc[lambda d: d["Date and Time"] > now]
+            # Sort the DataFrame by 'Date and Time' and Event Name in ...
+            # ...ascending order, and reset the index
+            .sort_values(by=["Date and Time", "Event"],
+                         ascending=[True, True],
+                         ignore_index=True)
+        )
+
+
+    def records_to_dataframe(self, events):
+        """Method to convert event records into a cleaned and sorted Pandas
+        DataFrame.
+        Arguments:
+        - events: The EventRecord objects to convert.
+        """
+        # Create a pandas DataFrame from the collected records
+        df = pd.DataFrame.from_records(
+            [event.to_row() for event in events],
+            columns=EVENT_COLUMNS,
+        )
+        return self.clean_dataframe(df)
+
 
+    @timed_stage("to_dataframe")
     def to_dataframe(self):
         """Method to convert all collected data into a Pandas DataFrame."""
-        # Create a pandas DataFrame from the collected data
-        self.output_df = pd.DataFrame(
-            {
-                "Event": self.event_names,
-                "Date and Time": self.event_times,
-                "Duration (in minutes)": self.event_durations,
-                "Venue": self.event_venues,
-                "Address": self.event_addresses,
-                "Lowest Price": self.event_low_prices,
-                "Highest Price": self.event_high_prices,
-                "Booking Status": self.event_booking_statuses,
-                "URL": self.event_URLs,
+        self.output_df = self.records_to_dataframe(self.events)
+
+
+    def iter_listing_pages(self):
+        """Method to fetch the event listing pages. This is a generator that
+        yields the listed details of the events of each listing page in
+        page order, while the following pages are fetched in the
+        background. It stops once the scraping process has been marked as
+        finished.
+        """
+        # Construct the base URL for event listings
+        url_key = "{}/d/{}--{}/music--events/" \
+                  .format(self.base_url, self.country.lower(),
+                          self.city.lower())
+        # Fetch a random page and extract the total number of pages ...
+        # ...from it
+        total_page_number, random_page_events = \
+            self.fetch_listing_page(url_key + "?page=2")
+        if total_page_number is None:
+            raise ValueError("No pagination found on the listing page {}"
+                             .format(url_key + "?page=2"))
+
+        # Fetch all the other listing pages in parallel, in the ...
+        # ...background, while the listing pages are processed in order
+        listing_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            listing_page_futures = {
+                page_num: listing_executor.submit(
+                    self.fetch_listing_page,
+                    url_key + "?page=" + str(page_num),
+                )
+                for page_num in range(1, total_page_number + 1)
+                if page_num != 2
             }
+            # Iterate through all listing pages in order
+            for page_num in range(1, total_page_number + 1):
+                if page_num == 2:
+                    # Reuse the page that was fetched to read the number ...
+                    # ...of pages
+                    yield random_page_events
+                else:
+                    # Wait for the events of the current listing page
+                    yield listing_page_futures[page_num].result()[1]
+                # Check if the scraping process has been marked as finished
+                if self.scraping_finished:
+                    # If so, exit the loop
+                    break
+        finally:
+            # Cancel the listing pages that have not been fetched yet, ...
+            # ...e.g. once the maximum number of events has been reached, ...
+            # ...without waiting for the requests already in flight
+            listing_executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def iter_events(self):
+        """Method to scrap music events data from Eventbrite website. This is
+        a generator that yields the EventRecord object of each event as soon
+        as its event page has been scraped, so that the events can be
+        consumed while the scraping is still going.
+        """
+        # Pin the reference datetime for the listing dates of this crawl. ...
+        # ...A replayed crawl uses the time of its recording, so that ...
+        # ...its results are deterministic
+        recorded_at = None
+        if self.transport == "record":
+            self.corpus.start_recording(self.country, self.city)
+        elif self.transport == "replay":
+            recorded_at = self.corpus.load_manifest().get("recorded_at")
+        self.set_reference_now(
+            datetime.fromisoformat(recorded_at) if recorded_at else None
         )
-        # Drop the rows that have missing values for either ...
-        # ...'Date and Time', 'Venue', or 'URL' columns
-        self.output_df.dropna(subset=["Date and Time", "Venue", "URL"],
-                              how="any")
-        # Keep the events that will occur after right now
-        self.output_df = self.output_df[
-            self.output_df["Date and Time"] > datetime.now()
-        ]
-        # Sort the DataFrame by 'Date and Time' and Event Name in ...
-        # ...ascending order
-        self.output_df.sort_values(
-            by=["Date and Time", "Event"],
-            ascending=[True, True],
-            inplace=True,
-        )
-        # Reset the index
-        self.output_df.reset_index(drop=True, inplace=True)
 
+        if self.known_events_path:
+            # Load the events scraped by the previous run
+            self.load_known_events()
+        if self.listing_digests_path:
+            # Load the listing pages of the previous run
+            self.load_listing_digests()
+
+        if self.parse_workers:
+            # Start the parsing processes with the parser settings
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                initializer=init_parse_worker,
+                initargs=(self.parser, self.partial_parsing),
+            )
+        try:
+            # Iterate through all listing pages and scrap data for each event
+            for listed_events in self.iter_listing_pages():
+                yield from self.scrap_listing_page(listed_events)
+        finally:
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown(cancel_futures=True)
+                self.parse_pool = None
+
+        if self.listing_digests_path:
+            # Save the listing pages of this run for the next run
+            self.save_listing_digests()
+        if self.known_events_path:
+            # Save the events scraped by this run for the next run
+            self.save_known_events()
+            print("{} unchanged events carried forward from the previous run."
+                  .format(self.carried_forward_count))
+        # Print a summary of the request latencies
+        self.print_latency_summary()
+        if self.scheduler is not None:
+            self.scheduler.print_summary()
+        if self.response_cache is not None:
+            # Evict expired and surplus cache entries, and print the ...
+            # ...cache statistics
+            self.response_cache.evict()
+            self.response_cache.print_summary()
+
+
+    @timed_stage("scrap_data")
+    def scrap_data(self):
+        """Method to scrap music events data from Eventbrite website."""
+        # Collect the records of all events
+        self.events.extend(self.iter_events())
+
+        # Convert all collected data into a Pandas DataFrame
+        self.to_dataframe()
+
+        # Print a status message for successful data scraping
+        print("Data successfully scraped!")
+
+
+    def load_checkpoint(self, checkpoint_path: str):
+        """Method to load the checkpoint of an interrupted streaming run.
+        Return None if there is no checkpoint to resume from.
+        Arguments:
+        - checkpoint_path (str): The path of the checkpoint file.
+        """
+        try:
+            with open(checkpoint_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+
+    def save_checkpoint(self, checkpoint_path: str, checkpoint: dict):
+        """Method to save the checkpoint of a streaming run.
+        Arguments:
+        - checkpoint_path (str): The path of the checkpoint file.
+        - checkpoint (dict): The CSV file name and the URLs of the events
+                      flushed so far.
+        """
+        # Write to a temporary file first so that an interruption ...
+        # ...never leaves a corrupted checkpoint
+        temp_path = checkpoint_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(checkpoint, file)
+        os.replace(temp_path, checkpoint_path)
+
+
+    def iter_batches(self, batch_size: int):
+        """Method to group the scraped events into lists of at most
+        batch_size events. This is a generator that yields each batch as
+        soon as it is full.
+        Arguments:
+        - batch_size (int): The maximum number of events per batch.
+        """
+        batch = []
+        for event in self.iter_events():
+            batch.append(event)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+    def stream_data(self, batch_size: int = 200, to_pgDB: bool = True,
+                    checkpoint_path: str = None):
+        """Method to scrap music events data and stream it to a CSV file and,
+        optionally, the PostgreSQL database in bounded-size batches, so that
+        the memory use does not grow with the crawl and an interrupted run
+        keeps the events flushed so far. Return the CSV file name.
+        Arguments:
+        - batch_size (int, optional): The maximum number of events written
+                      per batch. Default is 200.
+        - to_pgDB (bool, optional): Whether to also load the batches into
+                      the PostgreSQL database, according to the
+                      db_load_mode, in a single transaction at the end of
+                      the run. Default is True.
+        - checkpoint_path (str, optional): The path of a checkpoint file
+                      that records the events flushed so far. If an
+                      interrupted run left a checkpoint, the run resumes
+                      after its last flushed event and appends to its CSV
+                      file. Default is None.
+        """
+        checkpoint = self.load_checkpoint(checkpoint_path) \
+                     if checkpoint_path else None
+        if checkpoint:
+            # Resume the interrupted run
+            csv_file_name = checkpoint["csv_file_name"]
+            self.resumed_event_urls = set(checkpoint["flushed_urls"])
+            print("Resuming after {} flushed events."
+                  .format(len(self.resumed_event_urls)))
+        else:
+            csv_file_name = "music-events-{}-{}-{}.csv".format(
+                self.city.lower(),
+                self.country.lower(),
+                datetime.now().strftime("%Y%m%d%H%M%S"),
+            )
+            checkpoint = {"csv_file_name": csv_file_name, "flushed_urls": []}
+
+        conn = self.begin_pgDB_load() if to_pgDB else None
+        try:
+            if conn is not None and os.path.exists(csv_file_name):
+                # Load the events flushed by the interrupted run again, ...
+                # ...as its loaded batches were never committed. Empty ...
+                # ...event names are kept, as the column cannot be NULL
+                for flushed_df in pd.read_csv(
+                    csv_file_name, chunksize=batch_size,
+                    keep_default_na=False,
+                    na_values={column: [""] for column in EVENT_COLUMNS
+                               if column != "Event"},
+                ):
+                    self.load_batch_to_pgDB(conn, flushed_df)
+            for batch in self.iter_batches(batch_size):
+                batch_df = self.records_to_dataframe(batch)
+                # Append the batch to the CSV file, writing the header ...
+                # ...only for a new file
+                batch_df.to_csv(csv_file_name, mode="a", index=False,
+                                header=not os.path.exists(csv_file_name))
+                if conn is not None:
+                    self.load_batch_to_pgDB(conn, batch_df)
+                if checkpoint_path:
+                    # Record the flushed events to resume from on failure
+                    checkpoint["flushed_urls"].extend(
+                        event.url for event in batch if event.url
+                    )
+                    self.save_checkpoint(checkpoint_path, checkpoint)
+            if conn is not None:
+                self.end_pgDB_load(conn)
+        finally:
+            if conn is not None:
+                conn.close()
 
-    def scrap_data(self):
-        """Method to scrap music events data from Eventbrite website."""
-        # Construct the base URL for event listings
-        url_key = "https://www.eventbrite.com.au/d/{}--{}/music--events/" \
-                  .format(self.country.lower(), self.city.lower())
-        # Create a soup object for a random page
-        random_page_soup = self.create_soup(url_key + "?page=2")
-        # Extract the total number of pages from the random page
-        total_page_number = int(
-            random_page_soup.find("li", {"data-testid": "pagination-parent"})
-            .text.split("of")[-1]
-            .strip()
-        )
-
-        # Iterate through all listing pages and scrap data for each event
-        for page_num in range(1, total_page_number + 1):
-            # Construct the full URL for the current listing page
-            listing_page_url = url_key + "?page=" + str(page_num)
-            # Create a soup object for the current listing page
-            listing_page_soup = self.create_soup(listing_page_url)
-            # Scrap data from the current listing page
-            self.scrap_listing_page(listing_page_soup)
-            # Check if the scraping process has been marked as finished
-            if self.scraping_finished:
-                # If so, exit the loop
-                break
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            # Remove the checkpoint once the run has completed
+            os.remove(checkpoint_path)
+        print(f"The extracted data has been streamed to {csv_file_name}.")
+        self.write_metrics()
+        return csv_file_name
 
-        # Convert all collected data into a Pandas DataFrame
-        self.to_dataframe()
 
-        # Print a status message for successful data scraping
-        print("Data successfully scraped!")
+    def to_arrow_table(self, df):
+        """Method to convert a DataFrame of events into an Arrow table with
+        proper timestamp, integer and decimal column types.
+        Arguments:
+        - df: The DataFrame with the EVENT_COLUMNS columns to convert.
+        """
+        def to_numeric_array(column):
+            # Convert a column into a numeric Arrow array with nulls
+            return pa.array(pd.to_numeric(df[column]), type=pa.float64(),
+                            from_pandas=True)
+
+        return pa.table({
+            "Event": pa.array(df["Event"], type=pa.string()),
+            "Date and Time": pa.array(pd.to_datetime(df["Date and Time"]),
+                                      type=pa.timestamp("s")),
+            "Duration (in minutes)": to_numeric_array(
+                "Duration (in minutes)"
+            ).cast(pa.int32()),
+            "Venue": pa.array(df["Venue"], type=pa.string()),
+            "Address": pa.array(df["Address"], type=pa.string()),
+            # Round the prices to cents before casting them to decimals
+            "Lowest Price": pc.round(to_numeric_array("Lowest Price"), 2)
+                            .cast(pa.decimal128(10, 2)),
+            "Highest Price": pc.round(to_numeric_array("Highest Price"), 2)
+                             .cast(pa.decimal128(10, 2)),
+            "Booking Status": pa.array(df["Booking Status"],
+                                       type=pa.string()),
+            "URL": pa.array(df["URL"], type=pa.string()),
+        })
 
 
-    def send_email(self):
-        """Method to send an email with the scraped data as an attachment."""
-        # Construct an unique CSV file name using city, country, ...
+    @timed_stage("export_data")
+    def export_data(self):
+        """Method to save the scraped data in the configured export formats,
+        and return the paths of the exported files.
+        """
+        scrape_time = datetime.now()
+        # Construct an unique file name using city, country, ...
         # ...and current datetime
-        csv_file_name = "music-events-{}-{}-{}.csv".format(
+        file_name = "music-events-{}-{}-{}".format(
             self.city.lower(),
             self.country.lower(),
-            datetime.now().strftime("%Y%m%d%H%M%S"),
+            scrape_time.strftime("%Y%m%d%H%M%S"),
         )
-        # Save the dataframe as a CSV file
-        self.output_df.to_csv(csv_file_name)
-        # Print a message indicating the file save location
-        print(f"The extracted data has been saved as {csv_file_name}.")
-
-        # Define the email subject line, incorporating city and country names
-        subject = "🎶 Unmissable Music Events Coming Up in {}, {}! 🌟" \
-                  .format(self.city.title(), self.country.title())
+        # Partition the columnar files by city and scrape date, using ...
+        # ...the Hive directory layout that Spark can discover
+        partition_dir = os.path.join(
+            self.export_dir,
+            "city=" + self.city.lower(),
+            "scrape_date=" + scrape_time.strftime("%Y-%m-%d"),
+        )
+        file_paths = []
+        for export_format in self.export_formats:
+            if export_format == "csv":
+                file_path = file_name + ".csv"
+                if self.compression == "gzip":
+                    file_path += ".gz"
+                # Save the dataframe as a CSV file
+                self.output_df.to_csv(file_path, compression=self.compression)
+            else:
+                os.makedirs(partition_dir, exist_ok=True)
+                table = self.to_arrow_table(self.output_df)
+                if export_format == "parquet":
+                    file_path = os.path.join(partition_dir,
+                                             file_name + ".parquet")
+                    pq.write_table(table, file_path,
+                                   compression=self.compression or "none")
+                else:
+                    file_path = os.path.join(partition_dir,
+                                             file_name + ".arrow")
+                    feather.write_feather(
+                        table, file_path,
+                        compression="zstd" if self.compression
+                                    else "uncompressed",
+                    )
+            # Print a message indicating the file save location
+            print(f"The extracted data has been saved as {file_path}.")
+            file_paths.append(file_path)
+        self.exported_files = file_paths
+        return file_paths
 
-        # Read the content from the email template file
-        with open("email-html-body-template.txt", "r") as file:
-            body = file.read()
-        # Format the email template string to construct the HTML body ...
-        # ...of the email
-        body = body%(self.city.title(), self.city.title(), self.city.title())
 
+    def create_email_delivery(self):
+        """Method to create the EmailDelivery object of the email account
+        used when no EmailDelivery object is given.
+        """
         # Set up Email account credentials and SMTP server details
         sender_email = "[SENDER-EMAIL-ADDRESS]"
-        recipient_email = "[RECIPIENT-EMAIL-ADDRESS]"
         # To generate an app password for this program, go to ...
         # ...https://myaccount.google.com/security, search ...
         # ..."App Passwords", and create one
@@ -489,49 +3348,142 @@ class MusicEventScraper:
         smtp_server = "smtp.gmail.com"
         # Port number for SSL
         smtp_port = 465
-        path_to_attachment = csv_file_name
+        return EmailDelivery(sender_email, sender_password, smtp_server,
+                             smtp_port)
 
-        # Create a MIMEMultipart object to combine different parts of ...
-        # ...the email
-        message = MIMEMultipart()
-        message["Subject"] = subject
-        message["From"] = sender_email
-        message["To"] = recipient_email
-        # Attach the HTML body part to the email
-        body_part = MIMEText(body, "html")
-        message.attach(body_part)
 
-        # Attach the CSV file to the email
-        with open(path_to_attachment, "rb") as file:
-            message.attach(MIMEApplication(file.read(), Name=csv_file_name))
+    @timed_stage("send_email")
+    def send_email(self, file_paths: list = None):
+        """Method to send an email with the scraped data as attachments.
+        Arguments:
+        - file_paths (list, optional): The paths of the already exported
+                      files. If not provided, the data is exported first.
+        """
+        if file_paths is None:
+            # Save the scraped data in the configured export formats
+            file_paths = self.export_data()
+
+        # Define the email subject line, incorporating city and country names
+        subject = "🎶 Unmissable Music Events Coming Up in {}, {}! 🌟" \
+                  .format(self.city.title(), self.country.title())
+
+        # Set up the recipients of the email
+        recipient_emails = self.recipients or ["[RECIPIENT-EMAIL-ADDRESS]"]
 
-        # Login to the SMTP server and send the email
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email,
-                            recipient_email,
-                            message.as_string())
+        delivery = self.email_delivery or self.create_email_delivery()
+        try:
+            # Render the email template to construct the HTML body of ...
+            # ...the email, and build the message with the attached ...
+            # ...files once for all recipients
+            body = delivery.render_body(self.city.title())
+            message = delivery.build_message(subject, body, file_paths)
+            # Send the email to all recipients in batches
+            sent_count, failures = delivery.send(message, recipient_emails)
+        finally:
+            if self.email_delivery is None:
+                delivery.close()
 
         # Print a confirmation message after sending the email
-        print("An email with the CSV file has been sent to {}." \
-              .format(recipient_email))
+        print("An email with the exported files has been sent to {} of {} "
+              "recipients.".format(sent_count, len(recipient_emails)))
+        for recipient, error in failures.items():
+            print(f"Failed to send the email to {recipient}: {error}")
+        return failures
 
 
-    def move_to_pgDB(self):
-        """Method to transfer the scraped data to a local PostgreSQL
-        database.
+    @timed_stage("send_digests")
+    def send_digests(self):
+        """Method to send each subscriber a digest email with the events
+        that match their filter, attached as a small CSV file and shown
+        as an HTML table. Subscribers without matching events are not
+        sent an email.
         """
+        subject = "🎶 Your Music Events Coming Up in {}, {}! 🌟" \
+                  .format(self.city.title(), self.country.title())
+        file_name = "music-events-{}-{}.csv".format(
+            self.city.lower(), self.country.lower()
+        )
+        # Index the events once for all subscribers
+        index = EventIndex(self.output_df)
+
+        delivery = self.email_delivery or self.create_email_delivery()
+        try:
+            body = delivery.render_body(self.city.title())
+            messages = []
+            for subscriber in self.subscribers:
+                events = index.query(subscriber)
+                if events.empty:
+                    continue
+                # Add a table of the events at the end of the email body
+                table = events[["Event", "Date and Time", "Venue",
+                                "Lowest Price", "Booking Status"]] \
+                        .to_html(index=False, na_rep="")
+                messages.append((subscriber.email, delivery.build_message(
+                    subject,
+                    body.replace("</body>", table + "\n  </body>"),
+                    attachments=[(file_name,
+                                  events.to_csv(index=False).encode("utf-8"))],
+                )))
+            # Send the digests in batches
+            sent_count, failures = delivery.deliver(messages)
+        finally:
+            if self.email_delivery is None:
+                delivery.close()
+
+        print("Digests have been sent to {} of {} subscribers, {} without "
+              "matching events.".format(sent_count, len(self.subscribers),
+                                        len(self.subscribers)
+                                        - len(messages)))
+        for recipient, error in failures.items():
+            print(f"Failed to send the digest to {recipient}: {error}")
+        return failures
+
+
+    def connect_to_pgDB(self):
+        """Method to connect to the local PostgreSQL database."""
         # Connect to a local PostgreSQL database with credentials
-        conn = psycopg2.connect(
+        return psycopg2.connect(
             "dbname='[DATABASE-NAME]' user='[USERNAME]' password='[PASSWORD]' \
              port='5432' host='localhost'"
         )
-        # Enable autocommit to ensure that changes are immediately ...
-        # ...saved to the database
-        conn.set_session(autocommit=True)
-        # Create a cursor object to execute SQL commands
-        cur = conn.cursor()
 
+
+    def copy_to_pgDB(self, cur, table_name: str, df):
+        """Method to bulk load the rows of a DataFrame into a SQL table with
+        a single COPY FROM STDIN command.
+        Arguments:
+        - cur: The cursor object to execute the command with.
+        - table_name (str): The name of the SQL table.
+        - df: The DataFrame with the EVENT_COLUMNS columns to load.
+        """
+        # Write the rows into an in-memory CSV buffer. Missing values ...
+        # ...are written with an explicit NULL marker, which COPY loads ...
+        # ...as NULL, so no row-by-row NaN replacement is needed and ...
+        # ...empty strings stay empty instead of becoming NULL
+        buffer = io.StringIO()
+        # Store the canonical URLs, which the upsert is keyed on, so ...
+        # ...that a changed tracking parameter does not add a duplicate
+        df[EVENT_COLUMNS].assign(URL=df["URL"].map(self.canonical_url,
+                                               na_action="ignore")) \
+          .to_csv(buffer, index=False, header=False,
+                  date_format="%Y-%m-%d %H:%M:%S", na_rep="\\N")
+        buffer.seek(0)
+        cur.copy_expert(
+            """
+                COPY {}(Event, DateAndTime, Duration, Venue, Address,
+                        LowPrice, HighPrice, BookingStatus, URL)
+                FROM STDIN WITH (FORMAT csv, NULL '\\N')
+            """.format(table_name),
+            buffer,
+        )
+
+
+    def create_pgDB_table(self, cur):
+        """Method to create the MusicEvents table, or add the expiry column
+        and the index used by the upsert mode to an existing table.
+        Arguments:
+        - cur: The cursor object to execute SQL commands with.
+        """
         # Create a table named MusicEvents in the database if it ...
         # ...does not exist
         cur.execute(
@@ -546,53 +3498,156 @@ class MusicEventScraper:
                             LowPrice        DECIMAL,
                             HighPrice       DECIMAL,
                             BookingStatus   TEXT,
-                            URL             TEXT NOT NULL
+                            URL             TEXT NOT NULL,
+                            ExpiredAt       TIMESTAMP
                  )
             """
         )
-
-        # Truncate the table to remove all existing records
-        cur.execute("""TRUNCATE MusicEvents""")
-
-        # Iterate through each row in the DataFrame to insert data ...
-        # ...into the SQL table
-        for row_id in range(len(self.output_df)):
-            # Get the current row
-            row = self.output_df.loc[row_id]
-            # Extract data for each attribute from the current row
-            event = row["Event"]
-            date_and_time = row["Date and Time"]
-            duration = row["Duration (in minutes)"]
-            venue = row["Venue"]
-            address = row["Address"]
-            low_price = row["Lowest Price"]
-            high_price = row["Highest Price"]
-            booking_status = row["Booking Status"]
-            url = row["URL"]
-
-            # Replace the NaN values for duration, low_price, ...
-            # ...and high_price with None
-            if math.isnan(duration):
-                duration = None
-            if math.isnan(low_price):
-                low_price = None
-            if math.isnan(high_price):
-                high_price = None
-
-            # Insert current row of data into the SQL table
+        # Add the soft expiry column to tables created by earlier versions
+        cur.execute(
+            """
+                ALTER TABLE MusicEvents
+                ADD COLUMN IF NOT EXISTS ExpiredAt TIMESTAMP
+            """
+        )
+        if self.db_load_mode == "upsert":
+            # Create the unique index the upsert is keyed on
             cur.execute(
                 """
-                    INSERT INTO MusicEvents(Event, DateAndTime, Duration,
-                                            Venue, Address, LowPrice,
-                                            HighPrice,
-                                            BookingStatus, URL)
-                    VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,(event, date_and_time, duration, venue, address,
-                     low_price, high_price, booking_status, url))
-
-        # Execute a query to count the total number of records ...
-        # ...inserted into the SQL table
-        cur.execute("""SELECT COUNT(*) FROM MusicEvents""")
+                    CREATE UNIQUE INDEX IF NOT EXISTS MusicEvents_URL_idx
+                    ON MusicEvents (URL)
+                """
+            )
+
+
+    def create_pgDB_staging_table(self, cur, table_name: str,
+                                  drop_on_commit: bool = True):
+        """Method to create a temporary table with the columns of the
+        scraped data, to load it before it is merged into the MusicEvents
+        table.
+        Arguments:
+        - cur: The cursor object to execute SQL commands with.
+        - table_name (str): The name of the temporary table.
+        - drop_on_commit (bool, optional): Whether the table is dropped at
+                      the end of the transaction, rather than at the end
+                      of the session. Default is True.
+        """
+        cur.execute(
+            """
+                CREATE TEMP TABLE {} (
+                           Event           TEXT,
+                           DateAndTime     TIMESTAMP,
+                           Duration        DECIMAL,
+                           Venue           TEXT,
+                           Address         TEXT,
+                           LowPrice        DECIMAL,
+                           HighPrice       DECIMAL,
+                           BookingStatus   TEXT,
+                           URL             TEXT
+                ) ON COMMIT {}
+            """.format(table_name,
+                       "DROP" if drop_on_commit else "PRESERVE ROWS")
+        )
+
+
+    def upsert_to_pgDB(self, cur, df, expire_missing: bool = True):
+        """Method to upsert the rows of a DataFrame into the MusicEvents
+        table through a staging table, keyed by the canonical event URL.
+        Arguments:
+        - cur: The cursor object to execute SQL commands with.
+        - df: The DataFrame with the EVENT_COLUMNS columns to load.
+        - expire_missing (bool, optional): Whether to mark the events that
+                      are not in the DataFrame as expired. Default is True.
+        """
+        # Bulk load the rows into a temporary staging table that is ...
+        # ...dropped at the end of the transaction
+        self.create_pgDB_staging_table(cur, "MusicEventsStaging")
+        self.copy_to_pgDB(cur, "MusicEventsStaging", df)
+        self.merge_into_pgDB(cur, "MusicEventsStaging", expire_missing)
+
+
+    def merge_into_pgDB(self, cur, table_name: str,
+                        expire_missing: bool = True):
+        """Method to upsert the rows of a staging table into the
+        MusicEvents table, keyed by the canonical event URL.
+        Arguments:
+        - cur: The cursor object to execute SQL commands with.
+        - table_name (str): The name of the staging table.
+        - expire_missing (bool, optional): Whether to mark the events that
+                      are not in the staging table as expired.
+                      Default is True.
+        """
+        # Insert the new events, and update the events whose data has ...
+        # ...changed or that had expired. Unchanged rows are not rewritten
+        cur.execute(
+            """
+                INSERT INTO MusicEvents(Event, DateAndTime, Duration, Venue,
+                                        Address, LowPrice, HighPrice,
+                                        BookingStatus, URL)
+                SELECT DISTINCT ON (URL)
+                       Event, DateAndTime, Duration, Venue, Address,
+                       LowPrice, HighPrice, BookingStatus, URL
+                FROM {}
+                ORDER BY URL
+                ON CONFLICT (URL) DO UPDATE
+                SET Event = EXCLUDED.Event,
+                    DateAndTime = EXCLUDED.DateAndTime,
+                    Duration = EXCLUDED.Duration,
+                    Venue = EXCLUDED.Venue,
+                    Address = EXCLUDED.Address,
+                    LowPrice = EXCLUDED.LowPrice,
+                    HighPrice = EXCLUDED.HighPrice,
+                    BookingStatus = EXCLUDED.BookingStatus,
+                    ExpiredAt = NULL
+                WHERE MusicEvents.ExpiredAt IS NOT NULL
+                   OR (MusicEvents.Event, MusicEvents.DateAndTime,
+                       MusicEvents.Duration, MusicEvents.Venue,
+                       MusicEvents.Address, MusicEvents.LowPrice,
+                       MusicEvents.HighPrice, MusicEvents.BookingStatus)
+                      IS DISTINCT FROM
+                      (EXCLUDED.Event, EXCLUDED.DateAndTime,
+                       EXCLUDED.Duration, EXCLUDED.Venue,
+                       EXCLUDED.Address, EXCLUDED.LowPrice,
+                       EXCLUDED.HighPrice, EXCLUDED.BookingStatus)
+            """.format(table_name)
+        )
+        if expire_missing:
+            self.expire_missing_pgDB(cur, table_name)
+
+
+    def expire_missing_pgDB(self, cur, table_name: str):
+        """Method to soft expire the events that are no longer listed, i.e.
+        whose URL is not in a table of the scraped events.
+        Arguments:
+        - cur: The cursor object to execute SQL commands with.
+        - table_name (str): The name of the table with a URL column of the
+                      scraped events.
+        """
+        cur.execute(
+            """
+                UPDATE MusicEvents
+                SET ExpiredAt = NOW()
+                WHERE ExpiredAt IS NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {0}
+                      WHERE {0}.URL = MusicEvents.URL
+                  )
+            """.format(table_name)
+        )
+
+
+    def report_pgDB_count(self, cur):
+        """Method to count and print the number of current records in the
+        MusicEvents table.
+        Arguments:
+        - cur: The cursor object to execute SQL commands with.
+        """
+        # Execute a query to count the total number of current ...
+        # ...records in the SQL table
+        cur.execute(
+            """SELECT COUNT(*) FROM MusicEvents
+               WHERE ExpiredAt IS NULL"""
+        )
         records_count = cur.fetchall()[0][0]
 
         # Provide feedback on the success of the data migration
@@ -602,29 +3657,945 @@ class MusicEventScraper:
         else:
             print("No records added to your PostgreSQL database.")
 
+
+    @timed_stage("move_to_pgDB")
+    def move_to_pgDB(self):
+        """Method to transfer the scraped data to a local PostgreSQL
+        database.
+        """
+        conn = self.connect_to_pgDB()
+        # Run all the commands in one transaction, which is committed ...
+        # ...when the block exits without errors, so readers never see ...
+        # ...a partially loaded table
+        with conn:
+            # Create a cursor object to execute SQL commands
+            with conn.cursor() as cur:
+                self.create_pgDB_table(cur)
+
+                if self.db_load_mode == "upsert":
+                    # Upsert the rows of the DataFrame. If the scraping ...
+                    # ...stopped at the maximum number of events, the ...
+                    # ...events that were not reached are not expired
+                    self.upsert_to_pgDB(
+                        cur, self.output_df,
+                        expire_missing=not self.scraping_finished,
+                    )
+                else:
+                    # Truncate the table to remove all existing records
+                    cur.execute("""TRUNCATE MusicEvents""")
+                    # Bulk load all rows of the DataFrame into the SQL table
+                    self.copy_to_pgDB(cur, "MusicEvents", self.output_df)
+
+                self.report_pgDB_count(cur)
+
         # Close the connection to the database
         conn.close()
 
 
-    def run(self):
+    def begin_pgDB_load(self):
+        """Method to connect to the PostgreSQL database and prepare the
+        table for loading the scraped data in batches. Return the
+        connection.
+        The batches are loaded into a temporary table, and only merged
+        into the MusicEvents table at the end of the load, in a single
+        transaction, so that its locks are held for the merge alone rather
+        than the whole crawl, and readers never see a partially loaded
+        table.
+        """
+        conn = self.connect_to_pgDB()
+        try:
+            with conn.cursor() as cur:
+                self.create_pgDB_table(cur)
+                # Keep the loaded batches until the end of the session
+                self.create_pgDB_staging_table(cur, "MusicEventsLoad",
+                                               drop_on_commit=False)
+                conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+
+    def load_batch_to_pgDB(self, conn, df):
+        """Method to load a batch of scraped data into the PostgreSQL
+        database.
+        Arguments:
+        - conn: The connection returned by the begin_pgDB_load method.
+        - df: The DataFrame with the EVENT_COLUMNS columns of the batch.
+        """
+        with conn.cursor() as cur:
+            self.copy_to_pgDB(cur, "MusicEventsLoad", df)
+        conn.commit()
+
+
+    def end_pgDB_load(self, conn):
+        """Method to complete loading the scraped data in batches, in a
+        single transaction: replace the records with the loaded batches in
+        the replace mode, or upsert them and expire the events that are no
+        longer listed in the upsert mode.
+        Arguments:
+        - conn: The connection returned by the begin_pgDB_load method.
+        """
+        with conn.cursor() as cur:
+            if self.db_load_mode == "replace":
+                # Truncate the table to remove all existing records, and ...
+                # ...copy the loaded batches into it in the same transaction
+                cur.execute("""TRUNCATE MusicEvents""")
+                cur.execute(
+                    """
+                        INSERT INTO MusicEvents(Event, DateAndTime, Duration,
+                                                Venue, Address, LowPrice,
+                                                HighPrice, BookingStatus, URL)
+                        SELECT Event, DateAndTime, Duration, Venue, Address,
+                               LowPrice, HighPrice, BookingStatus, URL
+                        FROM MusicEventsLoad
+                    """
+                )
+            else:
+                # Expire the events that are not among the loaded rows, ...
+                # ...like the move_to_pgDB method. If the scraping ...
+                # ...stopped at the maximum number of events, the events ...
+                # ...that were not reached are not expired
+                self.merge_into_pgDB(
+                    cur, "MusicEventsLoad",
+                    expire_missing=not self.scraping_finished,
+                )
+            cur.execute("""DROP TABLE MusicEventsLoad""")
+            self.report_pgDB_count(cur)
+        conn.commit()
+
+
+    def run(self, pipelined: bool = True, batch_size: int = 200):
         """Method to orchestrate web scraping, emailing, and database
-        operations.
+        operations, profiled in profiling mode. With the 'record' and
+        'replay' transports, the data is only scraped and exported.
+        Arguments:
+        - pipelined (bool, optional): Whether to export and load the data
+                      into the database while the scraping is still going,
+                      with the run_pipelined method. If set to False, the
+                      steps run one after the other. Default is True.
+        - batch_size (int, optional): The number of events per batch in
+                      the pipelined run. Default is 200.
+        """
+        if not self.profile:
+            self.run_steps(pipelined, batch_size)
+            return
+        self.profiler = RunProfiler()
+        self.profiler.start()
+        try:
+            self.run_steps(pipelined, batch_size)
+        finally:
+            self.profiler.stop()
+            self.profiler.write(self.profile_base_path())
+
+
+    def profile_base_path(self):
+        """Method to get the path of the profile files without their
+        extensions, next to the exported CSV file.
+        """
+        for file_path in self.exported_files:
+            if ".csv" in os.path.basename(file_path):
+                return file_path.split(".csv")[0]
+        # Fall back to the name of the CSV file if it was not exported
+        return "music-events-{}-{}-{}".format(
+            self.city.lower(),
+            self.country.lower(),
+            datetime.now().strftime("%Y%m%d%H%M%S"),
+        )
+
+
+    def run_steps(self, pipelined: bool, batch_size: int):
+        """Method to run the web scraping, emailing, and database steps.
+        Arguments:
+        - pipelined (bool): Whether to run the steps with the run_pipelined
+                      method.
+        - batch_size (int): The number of events per batch in the
+                      pipelined run.
         """
+        if self.transport != "live":
+            # Only scrap and export the data of a recorded or replayed ...
+            # ...run, which must not email the recipients or overwrite ...
+            # ...the database with stale data
+            self.scrap_data()
+            self.export_data()
+            print("The emails and the database load are skipped with the "
+                  "{} transport.".format(self.transport))
+            self.write_metrics()
+            return
+        if pipelined:
+            self.run_pipelined(batch_size)
+            return
         # Call method to scrap music event data from Eventbrite website
         self.scrap_data()
         # Call method to send email with the CSV file attachment
         self.send_email()
+        if self.subscribers:
+            # Call method to send each subscriber their digest
+            self.send_digests()
         # Call method to migrate data to a local PostgreSQL database
         self.move_to_pgDB()
+        # Call method to write the metrics of the run
+        self.write_metrics()
+
+
+    def finish_export(self, frames):
+        """Method to merge the cleaned batches of the pipelined run into the
+        output DataFrame, export it, and return the paths of the exported
+        files.
+        Arguments:
+        - frames: The cleaned DataFrames of the batches.
+        """
+        df = pd.DataFrame(columns=EVENT_COLUMNS) if not frames \
+             else pd.concat(frames, ignore_index=True)
+        # Sort the merged batches like a single cleaned DataFrame
+        self.output_df = df.sort_values(by=["Date and Time", "Event"],
+                                        ascending=[True, True],
+                                        ignore_index=True)
+        return self.export_data()
+
+
+    def run_pipelined(self, batch_size: int = 200):
+        """Method to scrap music events data and, while the scraping is
+        still going, clean and export it and load it into the PostgreSQL
+        database in batches, each in its own thread. The email is sent
+        once both have completed. A failure of one of these steps does
+        not stop the others. A breakdown of the critical path of the run
+        is printed and added to the run report.
+        Arguments:
+        - batch_size (int, optional): The number of events per batch.
+                      Default is 200.
+        """
+        run_start = time.perf_counter()
+        export_frames = []
+        db_state = {"conn": None}
+
+        def load_batch(batch):
+            if db_state["conn"] is None:
+                db_state["conn"] = self.begin_pgDB_load()
+            self.load_batch_to_pgDB(db_state["conn"],
+                                    self.records_to_dataframe(batch))
+
+        def finish_load():
+            if db_state["conn"] is None:
+                db_state["conn"] = self.begin_pgDB_load()
+            self.end_pgDB_load(db_state["conn"])
+
+        def close_load():
+            # Disconnect, which drops the loaded batches if the load ...
+            # ...did not complete
+            if db_state["conn"] is not None:
+                db_state["conn"].close()
+
+        sinks = [
+            PipelineSink(
+                "export",
+                lambda batch: export_frames.append(
+                    self.records_to_dataframe(batch)
+                ),
+                finish=lambda: self.finish_export(export_frames),
+            ),
+            PipelineSink("database", load_batch, finish=finish_load,
+                         cleanup=close_load),
+        ]
+        for sink in sinks:
+            sink.start()
+
+        # Scrap the events and hand each batch to all sinks
+        scrape_error = None
+        if self.profiler is not None:
+            self.profiler.begin_stage("scrap_data")
+        try:
+            for batch in self.iter_batches(batch_size):
+                self.events.extend(batch)
+                for sink in sinks:
+                    sink.put(batch)
+        except BaseException as e:
+            scrape_error = e
+            raise
+        finally:
+            scrape_end = time.perf_counter()
+            self.metrics.observe("scrap_data", scrape_end - run_start)
+            # Let the sinks finish, or abort them if the scraping failed
+            for sink in sinks:
+                sink.close(scrape_error)
+            if self.profiler is not None:
+                self.profiler.end_stage("scrap_data")
+        print("Data successfully scraped!")
+
+        # Send the emails once the final sink has completed
+        email_start = time.perf_counter()
+        email_error = None
+        export_sink = sinks[0]
+        if export_sink.error is None:
+            try:
+                self.send_email(export_sink.result)
+                if self.subscribers:
+                    self.send_digests()
+            except Exception as e:
+                email_error = e
+                print(f"Failed to send the emails: {e}")
+        else:
+            email_error = export_sink.error
+            print("The emails were not sent, as the export failed.")
+        email_end = time.perf_counter()
+
+        self.critical_path = self.critical_path_breakdown(
+            run_start, scrape_end, sinks, email_start, email_end, email_error
+        )
+        self.write_metrics()
+
+
+    def critical_path_breakdown(self, run_start, scrape_end, sinks,
+                                email_start, email_end, email_error):
+        """Method to print and return the breakdown of the critical path of
+        a pipelined run: the scraping, the part of the slowest sink that
+        ran after the scraping, and the emails.
+        Arguments:
+        - run_start: The performance counter at the start of the run.
+        - scrape_end: The performance counter at the end of the scraping.
+        - sinks: The PipelineSink objects of the run.
+        - email_start: The performance counter when the emails started.
+        - email_end: The performance counter when the emails were sent.
+        - email_error: The error of the emails, or None.
+        """
+        stages = {
+            "scrape": {"start": 0.0, "end": scrape_end - run_start,
+                       "busy": scrape_end - run_start, "failed": False},
+        }
+        for sink in sinks:
+            stages[sink.name] = {
+                "start": sink.started_at - run_start,
+                "end": sink.finished_at - run_start,
+                "busy": sink.busy_seconds,
+                "failed": sink.error is not None,
+            }
+        stages["email"] = {"start": email_start - run_start,
+                           "end": email_end - run_start,
+                           "busy": email_end - email_start,
+                           "failed": email_error is not None}
+        # The emails wait for the sink that finishes last
+        last_sink = max(sinks, key=lambda sink: sink.finished_at)
+        path = [
+            ("scrape", scrape_end - run_start),
+            (last_sink.name + " tail",
+             max(0.0, last_sink.finished_at - scrape_end)),
+            ("email", email_end - email_start),
+        ]
+        total = email_end - run_start
+
+        print("{:<10} {:>8} {:>8} {:>8}  {}".format("stage", "start", "end",
+                                                    "busy", "status"))
+        for name, stage in stages.items():
+            print("{:<10} {:>8.2f} {:>8.2f} {:>8.2f}  {}".format(
+                name, stage["start"], stage["end"], stage["busy"],
+                "failed" if stage["failed"] else "ok"))
+        print("Critical path: {} = {:.2f}s of {:.2f}s".format(
+            " -> ".join("{} {:.2f}s".format(name, seconds)
+                        for name, seconds in path),
+            sum(seconds for _, seconds in path), total))
+        return {
+            "stages": stages,
+            "path": [{"stage": name, "seconds": seconds}
+                     for name, seconds in path],
+            "total_seconds": total,
+        }
+
+
+    def write_metrics(self):
+        """Method to write the run report and the Prometheus metrics file,
+        if their paths are configured.
+        """
+        labels = {"country": self.country.lower(), "city": self.city.lower()}
+        if self.response_cache is not None:
+            self.metrics.set("cache_hits", self.response_cache.hits)
+            self.metrics.set("cache_misses", self.response_cache.misses)
+        if self.metrics_path:
+            report_fields = dict(labels)
+            if self.critical_path is not None:
+                report_fields["critical_path"] = self.critical_path
+            self.metrics.write_json(self.metrics_path, report_fields)
+            print(f"The run report has been saved as {self.metrics_path}.")
+        if self.prometheus_path:
+            self.metrics.write_prometheus(self.prometheus_path, labels)
+
+
+
+# The scraper used by a parsing worker process to extract page details
+parse_worker_scraper = None
+
+
+def init_parse_worker(parser: str, partial_parsing: bool):
+    """Function to initialize a parsing worker process with the parser
+    settings of the crawl.
+    Arguments:
+    - parser (str): The BeautifulSoup tree builder used to parse the pages.
+    - partial_parsing (bool): Whether to build only the parts of the page
+                  trees that are used for scraping.
+    """
+    global parse_worker_scraper
+    parse_worker_scraper = MusicEventScraper("", "", parser=parser,
+                                             partial_parsing=partial_parsing)
+
+
+def parse_listing_page_content(c):
+    """Function to parse the content of a listing page in a worker process.
+    Return the total number of listing pages and the listed details of the
+    events with their unparsed time strings, with the stage histograms of
+    the parsing and extraction.
+    Arguments:
+    - c: The HTML content of a listing page.
+    """
+    # Collect the stage timings of this page only
+    parse_worker_scraper.metrics = RunMetrics()
+    soup = parse_worker_scraper.parse_html(c, LISTING_PAGE_STRAINER)
+    result = (parse_worker_scraper.extract_total_pages(soup),
+              parse_worker_scraper.extract_listed_events(soup))
+    return result, parse_worker_scraper.metrics.stages
+
+
+def parse_event_page_content(c):
+    """Function to parse the content of an event page in a worker process.
+    Return the details of the event, with the stage histograms of the
+    parsing and extraction.
+    Arguments:
+    - c: The HTML content of an event page.
+    """
+    # Collect the stage timings of this page only
+    parse_worker_scraper.metrics = RunMetrics()
+    soup = parse_worker_scraper.parse_html(c, EVENT_PAGE_STRAINER)
+    result = parse_worker_scraper.parse_event_page(soup)
+    return result, parse_worker_scraper.metrics.stages
+
+
+
+class MultiCityScraper:
+    """Define a class that scraps music events for several cities
+    concurrently, with one shared politeness scheduler and one shared
+    dedup index, and merges the results into a single output.
+    """
+
+    def __init__(self, locations: list, max_cities: int = 4,
+                 requests_per_second: float = 5, **scraper_kwargs):
+        """Initialize a new instance of the MultiCityScraper class.
+        Arguments:
+        - locations (list): The (country, city) pairs to scrap events for.
+        - max_cities (int, optional): The maximum number of cities to scrap
+                      concurrently. Default is 4.
+        - requests_per_second (float, optional): The maximum number of
+                      requests per second made by all cities together to
+                      the same host. The scheduler adapts the rate below
+                      it to the responses of the host. Default is 5.
+        - scraper_kwargs: Additional arguments passed to each
+                      MusicEventScraper. The known_events_path and
+                      listing_digests_path arguments may contain {country}
+                      and {city} placeholders, so that each city keeps its
+                      own state files.
+        """
+        self.locations = locations
+        self.max_cities = max(1, max_cities)
+        self.scraper_kwargs = scraper_kwargs
+        # Create the scheduler and dedup index shared by all cities
+        self.scheduler = PolitenessScheduler(
+            initial_rate=min(2, requests_per_second),
+            max_rate=requests_per_second,
+        )
+        self.dedup_index = DedupIndex()
+        self.scrapers = []
+        self.output_df = None
+
+
+    def create_scraper(self, country: str, city: str):
+        """Method to create the scraper of a city.
+        Arguments:
+        - country (str): The country where the music events are located.
+        - city (str): The city where the music events occur.
+        """
+        kwargs = dict(self.scraper_kwargs)
+        for path_arg in ("known_events_path", "listing_digests_path"):
+            if kwargs.get(path_arg):
+                kwargs[path_arg] = kwargs[path_arg] \
+                    .format(country=country.lower(), city=city.lower())
+        return MusicEventScraper(country, city,
+                                 scheduler=self.scheduler,
+                                 dedup_index=self.dedup_index, **kwargs)
+
+
+    def scrap_city(self, scraper):
+        """Method to scrap the music events of a city. Return the scraped
+        DataFrame, or None if the scraping failed.
+        Arguments:
+        - scraper: The MusicEventScraper object of the city.
+        """
+        try:
+            scraper.scrap_data()
+        except Exception as e:
+            # Keep the results of the other cities if one city fails
+            print("Failed to scrap {}, {}: {}".format(scraper.city,
+                                                     scraper.country, e))
+            return None
+        return scraper.output_df
+
+
+    def scrap_data(self):
+        """Method to scrap the music events of all cities concurrently and
+        merge them into one DataFrame.
+        """
+        self.scrapers = [self.create_scraper(country, city)
+                         for country, city in self.locations]
+        with ThreadPoolExecutor(max_workers=self.max_cities) as executor:
+            output_dfs = list(executor.map(self.scrap_city, self.scrapers))
+
+        # Merge the results, adding the country and city of each event
+        merged_dfs = []
+        for scraper, output_df in zip(self.scrapers, output_dfs):
+            if output_df is not None:
+                output_df = output_df.copy()
+                output_df.insert(0, "City", scraper.city.title())
+                output_df.insert(0, "Country", scraper.country.title())
+                merged_dfs.append(output_df)
+        if merged_dfs:
+            self.output_df = pd.concat(merged_dfs, ignore_index=True)
+        else:
+            self.output_df = pd.DataFrame(columns=["Country", "City"]
+                                          + EVENT_COLUMNS)
+        self.output_df.sort_values(
+            by=["Date and Time", "Event"],
+            ascending=[True, True],
+            inplace=True,
+        )
+        self.output_df.reset_index(drop=True, inplace=True)
+        print("Data successfully scraped for {} of {} cities!"
+              .format(len(merged_dfs), len(self.locations)))
+
+
+    def save_csv(self):
+        """Method to save the merged DataFrame as a CSV file, and return
+        the file name.
+        """
+        csv_file_name = "music-events-multi-city-{}.csv".format(
+            datetime.now().strftime("%Y%m%d%H%M%S")
+        )
+        self.output_df.to_csv(csv_file_name)
+        print(f"The extracted data has been saved as {csv_file_name}.")
+        return csv_file_name
+
+
+    def run(self):
+        """Method to scrap the music events of all cities and save the
+        merged result.
+        """
+        self.scrap_data()
+        self.save_csv()
+
+
+
+def peak_rss_mb():
+    """Function to get the peak resident memory of the process in MB, or
+    None if it is not available on this platform.
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The peak is reported in bytes on macOS and in kilobytes elsewhere
+    if os.uname().sysname == "Darwin":
+        return peak_rss / 1024 / 1024
+    return peak_rss / 1024
+
+
+class CorpusStubHandler(http.server.BaseHTTPRequestHandler):
+    """Define a request handler that serves the pages of a recorded corpus
+    with a fixed latency, as a local stub of the website for benchmarks.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """Method to serve the recorded page of the requested path."""
+        # Simulate the network round trip to the website
+        time.sleep(self.server.latency)
+        content = self.server.corpus.replay(EVENTBRITE_URL + self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        # Point the links of the page at the stub server
+        content = content.replace(EVENTBRITE_URL.encode(),
+                                  self.server.base_url.encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+    def log_message(self, format, *args):
+        """Method to silence the log of the requests."""
+
+
+
+def start_stub_server(corpus_dir: str, latency: float):
+    """Function to start a local stub HTTP server that serves a recorded
+    corpus in a background thread, and return it. Its URL is in its
+    base_url attribute.
+    Arguments:
+    - corpus_dir (str): The directory of the recorded corpus.
+    - latency (float): The number of seconds each response is delayed.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0),
+                                             CorpusStubHandler)
+    server.daemon_threads = True
+    server.corpus = ReplayCorpus(corpus_dir)
+    server.latency = latency
+    server.base_url = "http://127.0.0.1:{}".format(server.server_address[1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_configuration(corpus_dir: str, country: str, city: str,
+                            parser: str, max_workers: int,
+                            parse_workers: int, include_db: bool,
+                            base_url: str = None):
+    """Function to benchmark one configuration of the scraper over a
+    recorded corpus, and return its results. It is run in a fresh process,
+    so that the peak memory is that of the configuration alone.
+    Arguments:
+    - corpus_dir (str): The directory of the recorded corpus.
+    - country (str): The country of the recorded corpus.
+    - city (str): The city of the recorded corpus.
+    - parser (str): The parser to benchmark.
+    - max_workers (int): The number of worker threads to benchmark.
+    - parse_workers (int): The number of parsing processes to benchmark.
+    - include_db (bool): Whether to also time loading the data into the
+                  PostgreSQL database.
+    - base_url (str, optional): The URL of a stub server that serves the
+                  corpus. If set to None, the corpus is replayed.
+                  Default is None.
+    """
+    if base_url is None:
+        scraper = MusicEventScraper(country, city,
+                                    max_workers=max_workers,
+                                    parser=parser,
+                                    transport="replay",
+                                    corpus_dir=corpus_dir,
+                                    parse_workers=parse_workers)
+    else:
+        scraper = MusicEventScraper(country, city,
+                                    max_workers=max_workers,
+                                    parser=parser,
+                                    parse_workers=parse_workers,
+                                    base_url=base_url)
+    start_time = time.perf_counter()
+    scraper.events.extend(scraper.iter_events())
+    scraper.to_dataframe()
+    elapsed = time.perf_counter() - start_time
+    result = {
+        "parser": parser,
+        "max_workers": max_workers,
+        "parse_workers": parse_workers,
+        "events": len(scraper.events),
+        "seconds": elapsed,
+        "pages_per_sec": len(scraper.request_latencies) / elapsed,
+        "parse_ms_per_page": 1000 * scraper.metrics.stage_mean("parse"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if include_db:
+        start_time = time.perf_counter()
+        scraper.move_to_pgDB()
+        result["db_load_seconds"] = time.perf_counter() - start_time
+    return result
+
+
+def benchmark_dedup(event_count: int, dedup_key: str,
+                    chunk_size: int = 10000):
+    """Function to benchmark the dedup of synthetic listed events, i.e. the
+    event_key method and the DedupIndex, and return its results with the
+    cost per event of the first and the last chunk of events, which are
+    the same if the cost is flat.
+    Arguments:
+    - event_count (int): The number of synthetic events.
+    - dedup_key (str): The dedup key policy to benchmark.
+    - chunk_size (int, optional): The number of events per chunk.
+                  Default is 10000.
+    """
+    scraper = MusicEventScraper("Australia", "Sydney", dedup_key=dedup_key)
+    start_datetime = datetime(2030, 1, 1, 19, 30)
+    # Build the events before timing, with recurring names and every ...
+    # ...tenth event listed twice
+    events = []
+    for event_num in range(event_count):
+        if event_num % 10 == 9:
+            event_num -= 1
+        events.append((
+            "Gig {}".format(event_num % 1000),
+            "{}/e/gig-{}-tickets-{}?aff=ebdssbdestsearch"
+            .format(EVENTBRITE_URL, event_num, 100000000000 + event_num),
+            start_datetime + timedelta(hours=event_num),
+        ))
+    chunk_seconds = []
+    for start in range(0, event_count, chunk_size):
+        start_time = time.perf_counter()
+        for event_name, event_url, event_time in \
+                events[start:start + chunk_size]:
+            scraper.dedup_index.add(
+                scraper.event_key(event_name, event_url, event_time)
+            )
+        chunk_seconds.append(time.perf_counter() - start_time)
+    first_chunk_size = min(chunk_size, event_count)
+    last_chunk_size = event_count - (len(chunk_seconds) - 1) * chunk_size
+    return {
+        "dedup_key": dedup_key,
+        "events": event_count,
+        "unique_events": len(scraper.dedup_index),
+        "seconds": sum(chunk_seconds),
+        "first_us_per_event": 1e6 * chunk_seconds[0] / first_chunk_size,
+        "last_us_per_event": 1e6 * chunk_seconds[-1] / last_chunk_size,
+    }
+
+
+def synthetic_events_dataframe(row_count: int):
+    """Function to build a DataFrame of synthetic cleaned events, with
+    some missing values, for benchmarks.
+    Arguments:
+    - row_count (int): The number of rows.
+    """
+    row_nums = np.arange(row_count)
+    low_prices = (row_nums % 50).astype(float)
+    # Leave the prices of every tenth event and the booking status of ...
+    # ...most events missing, as on the website
+    low_prices[row_nums % 10 == 0] = np.nan
+    return pd.DataFrame({
+        "Event": ["Gig {}".format(row_num) for row_num in row_nums],
+        "Date and Time": pd.Timestamp(2030, 1, 1, 19, 30)
+                         + pd.to_timedelta(row_nums, unit="h"),
+        "Duration (in minutes)": 60 + row_nums % 4 * 30,
+        "Venue": ["Venue {}".format(row_num % 500) for row_num in row_nums],
+        "Address": ["{} George St Sydney, NSW 2000".format(row_num % 500)
+                    for row_num in row_nums],
+        "Lowest Price": low_prices,
+        "Highest Price": low_prices * 2,
+        "Booking Status": np.where(row_nums % 5 == 0, "Going fast", None),
+        "URL": ["{}/e/gig-{}-tickets-{}".format(EVENTBRITE_URL, row_num,
+                                                100000000000 + row_num)
+                for row_num in row_nums],
+    })[EVENT_COLUMNS]
+
+
+def benchmark_db_load(row_count: int, db_load_mode: str):
+    """Function to benchmark loading synthetic events into the MusicEvents
+    table of the PostgreSQL database with the move_to_pgDB method, and
+    return its results.
+    Arguments:
+    - row_count (int): The number of synthetic events.
+    - db_load_mode (str): The db_load_mode to benchmark.
+    """
+    scraper = MusicEventScraper("Australia", "Sydney",
+                                db_load_mode=db_load_mode)
+    scraper.output_df = synthetic_events_dataframe(row_count)
+    start_time = time.perf_counter()
+    scraper.move_to_pgDB()
+    elapsed = time.perf_counter() - start_time
+    return {
+        "db_load_mode": db_load_mode,
+        "rows": row_count,
+        "seconds": elapsed,
+        "rows_per_sec": row_count / elapsed,
+    }
+
+
+def run_benchmark(corpus_dir: str = "corpus", worker_counts=(1, 4, 8),
+                  parsers=("html.parser", "lxml"), include_db: bool = False,
+                  parse_worker_counts=(0,), mode: str = "replay",
+                  stub_latency: float = 0.05,
+                  event_counts=(10000, 50000, 100000),
+                  row_counts=(10000, 100000)):
+    """Function to benchmark the scraper offline over a recorded corpus,
+    and return the results of each configuration. In the 'stub' mode,
+    the pages are fetched from a local stub HTTP server with a fixed
+    latency, which shows the speedup of the concurrent fetching. The
+    'dedup' and 'db' modes benchmark the dedup of synthetic events and
+    their load into the PostgreSQL database instead, and do not need a
+    corpus. The 'db' mode replaces the data of the MusicEvents table, so
+    it should be run against a scratch database.
+    Arguments:
+    - corpus_dir (str, optional): The directory of the recorded corpus.
+                  Default is 'corpus'.
+    - worker_counts (optional): The numbers of worker threads to benchmark.
+                  Default is (1, 4, 8).
+    - parsers (optional): The parsers to benchmark.
+                  Default is ('html.parser', 'lxml').
+    - include_db (bool, optional): Whether to also time loading the data
+                  into the PostgreSQL database. Default is False.
+    - parse_worker_counts (optional): The numbers of parsing processes to
+                  benchmark. Default is (0,).
+    - mode (str, optional): The benchmark mode, among BENCHMARK_MODES.
+                  Default is 'replay'.
+    - stub_latency (float, optional): The number of seconds each response
+                  of the stub server is delayed. Default is 0.05.
+    - event_counts (optional): The numbers of synthetic events of the
+                  'dedup' mode. Default is (10000, 50000, 100000).
+    - row_counts (optional): The numbers of synthetic events of the 'db'
+                  mode. Default is (10000, 100000).
+    """
+    if mode not in BENCHMARK_MODES:
+        raise ValueError("mode must be one of {}, not {!r}"
+                         .format(", ".join(BENCHMARK_MODES), mode))
+    if mode == "dedup":
+        results = [benchmark_dedup(event_count, dedup_key)
+                   for dedup_key in DEDUP_KEY_POLICIES
+                   for event_count in event_counts]
+        # Print a table of the cost per event, which stays flat as the ...
+        # ...number of events grows
+        print("{:<10} {:>8} {:>8} {:>9} {:>11} {:>10}".format(
+            "key", "events", "unique", "seconds", "first us/ev",
+            "last us/ev"))
+        for result in results:
+            print("{:<10} {:>8} {:>8} {:>9.3f} {:>11.2f} {:>10.2f}".format(
+                result["dedup_key"], result["events"],
+                result["unique_events"], result["seconds"],
+                result["first_us_per_event"], result["last_us_per_event"]))
+        return results
+    if mode == "db":
+        # Each upsert follows a replace of the same rows, so it times ...
+        # ...the comparison of unchanged rows
+        results = [benchmark_db_load(row_count, db_load_mode)
+                   for row_count in row_counts
+                   for db_load_mode in DB_LOAD_MODES]
+        print("{:<8} {:>8} {:>9} {:>10}".format(
+            "mode", "rows", "seconds", "rows/sec"))
+        for result in results:
+            print("{:<8} {:>8} {:>9.2f} {:>10.0f}".format(
+                result["db_load_mode"], result["rows"], result["seconds"],
+                result["rows_per_sec"]))
+        return results
+    manifest = ReplayCorpus(corpus_dir).load_manifest()
+    if not manifest:
+        raise FileNotFoundError(
+            "No recorded corpus in {}. Run with --transport record first."
+            .format(corpus_dir)
+        )
+    stub_server = start_stub_server(corpus_dir, stub_latency) \
+                  if mode == "stub" else None
+    results = []
+    try:
+        for parser in parsers:
+            for parse_workers in parse_worker_counts:
+                for max_workers in worker_counts:
+                    # Run each configuration in a new process, as the ...
+                    # ...peak memory of a process only ever grows
+                    with ProcessPoolExecutor(max_workers=1) as pool:
+                        result = pool.submit(
+                            benchmark_configuration, corpus_dir,
+                            manifest["country"], manifest["city"], parser,
+                            max_workers, parse_workers, include_db,
+                            stub_server.base_url if stub_server else None,
+                        ).result()
+                    # Compare with the first number of worker threads
+                    if max_workers == worker_counts[0]:
+                        baseline_seconds = result["seconds"]
+                    result["speedup"] = baseline_seconds / result["seconds"]
+                    results.append(result)
+    finally:
+        if stub_server is not None:
+            stub_server.shutdown()
+            stub_server.server_close()
+
+    # Print a table of the benchmark results
+    print("{:<12} {:>7} {:>7} {:>7} {:>9} {:>8} {:>10} {:>9} {:>9}".format(
+        "parser", "workers", "procs", "events", "seconds", "speedup",
+        "pages/sec", "parse ms", "peak MB"))
+    row_format = "{:<12} {:>7} {:>7} {:>7} {:>9.2f} {:>7.2f}x {:>10.1f} " \
+                 "{:>9.2f} {:>9}"
+    for result in results:
+        print(row_format.format(
+            result["parser"], result["max_workers"], result["parse_workers"],
+            result["events"], result["seconds"], result["speedup"],
+            result["pages_per_sec"], result["parse_ms_per_page"],
+            "n/a" if result["peak_rss_mb"] is None
+            else "{:.0f}".format(result["peak_rss_mb"])))
+        if "db_load_seconds" in result:
+            print("    DB load: {:.2f}s".format(result["db_load_seconds"]))
+    return results
 
 
 
 # Check if this script is being run directly (and not imported as a module)
 if __name__ == "__main__":
-    # Create a MusicEventScraper object to scrap data for all available ...
-    # ...music events that will occur in Sydney, Australia
-    scraper = MusicEventScraper(country="Australia",
-                                city="Sydney",
-                                max_events=0)
-    # Start the program
-    scraper.run()
+    # Parse the command line options
+    arg_parser = argparse.ArgumentParser(
+        description="Scrap music events data from Eventbrite website."
+    )
+    arg_parser.add_argument("--transport", choices=TRANSPORT_MODES,
+                            default="live",
+                            help="fetch pages live, record them to the "
+                                 "corpus, or replay them from the corpus")
+    arg_parser.add_argument("--corpus-dir", default="corpus",
+                            help="directory of the recorded pages")
+    arg_parser.add_argument("--benchmark", nargs="?", const="replay",
+                            choices=BENCHMARK_MODES,
+                            help="benchmark the scraper over the recorded "
+                                 "corpus instead of running the program, "
+                                 "replayed or served by a local stub "
+                                 "server, or benchmark the dedup or the "
+                                 "database load of synthetic events "
+                                 "(default: replay; db replaces the "
+                                 "MusicEvents data)")
+    arg_parser.add_argument("--stub-latency", type=float, default=0.05,
+                            help="seconds each response of the stub "
+                                 "server is delayed")
+    arg_parser.add_argument("--benchmark-db", action="store_true",
+                            help="also time the database load when "
+                                 "benchmarking")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="profile the run and write the profiles "
+                                 "next to the CSV file (also enabled by "
+                                 "the {} environment variable)"
+                                 .format(PROFILE_ENV_VAR))
+    arg_parser.add_argument("--parse-workers", type=int,
+                            default=os.cpu_count() or 1,
+                            help="number of processes that parse the "
+                                 "pages, or 0 to parse them in the "
+                                 "fetching threads")
+    args = arg_parser.parse_args()
+
+    if args.benchmark:
+        # Run the offline benchmark suite
+        if args.benchmark == "stub":
+            # Show the speedup of the concurrent fetching
+            run_benchmark(args.corpus_dir, worker_counts=(1, 2, 4, 8, 16),
+                          parsers=("lxml",), include_db=args.benchmark_db,
+                          mode="stub", stub_latency=args.stub_latency)
+        elif args.benchmark == "dedup":
+            # Show the flat cost per event up to 200k events
+            run_benchmark(mode="dedup",
+                          event_counts=(10000, 50000, 100000, 200000))
+        elif args.benchmark == "db":
+            run_benchmark(mode="db")
+        else:
+            run_benchmark(args.corpus_dir, include_db=args.benchmark_db,
+                          parse_worker_counts=(0, args.parse_workers))
+    else:
+        # Revalidate and carry forward unchanged pages in live mode ...
+        # ...only, as a recorded corpus must hold every page in full
+        live = args.transport == "live"
+        # Create a MusicEventScraper object to scrap data for all ...
+        # ...available music events that will occur in Sydney, Australia
+        scraper = MusicEventScraper(country="Australia",
+                                    city="Sydney",
+                                    max_events=0,
+                                    max_workers=max(8, args.parse_workers),
+                                    cache_dir="http-cache" if live else None,
+                                    known_events_path="known-events.json"
+                                                      if live else None,
+                                    listing_digests_path=
+                                        "listing-digests.json"
+                                        if live else None,
+                                    parser="lxml",
+                                    db_load_mode="upsert",
+                                    transport=args.transport,
+                                    corpus_dir=args.corpus_dir,
+                                    metrics_path="run-report.json",
+                                    prometheus_path="music_scraper.prom",
+                                    parse_workers=args.parse_workers,
+                                    scheduler=PolitenessScheduler(),
+                                    profile=args.profile or None)
+        # Start the program
+        scraper.run()